@@ -0,0 +1,115 @@
+import os
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger("fremem")
+
+# How long the first query of a batch waits for others to join it (0 disables batching)
+QUERY_BATCH_WAIT_MS = float(os.environ.get("MCP_MEMORY_QUERY_BATCH_WAIT_MS", "2"))
+# Queries embedded per forward pass at most
+QUERY_BATCH_MAX_SIZE = int(os.environ.get("MCP_MEMORY_QUERY_BATCH_MAX_SIZE", "32"))
+
+
+class EmbeddingScheduler:
+    """
+    Micro-batches concurrent single-text encode calls into one forward pass.
+
+    Callers block in encode() while a dispatcher thread collects requests for
+    up to `max_wait_ms` after the first one arrives (or until `max_batch` are
+    queued), embeds them together with `encode_batch` and hands each caller its
+    vector. Identical texts in a batch are embedded once. Trades at most
+    `max_wait_ms` of latency for far fewer model calls under concurrent load.
+    """
+    def __init__(self, encode_batch: Callable[[List[str]], Any], max_batch: int = QUERY_BATCH_MAX_SIZE,
+                 max_wait_ms: float = QUERY_BATCH_WAIT_MS):
+        self.encode_batch = encode_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "max_batch_size": 0,
+            "queue_delay_ms_total": 0.0,
+            "queue_delay_ms_max": 0.0,
+            "encode_ms_total": 0.0,
+        }
+
+    def encode(self, text: str) -> List[float]:
+        """Embedding of `text`, computed in a batch with concurrent callers."""
+        future = Future()
+        self._queue.put((text, future, time.monotonic()))
+        self._ensure_dispatcher()
+        return future.result()
+
+    def _ensure_dispatcher(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._dispatch, name="fremem-embed-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            texts = list(dict.fromkeys(text for text, _, _ in batch))
+            try:
+                vectors = self.encode_batch(texts)
+                by_text = {
+                    text: (vector.tolist() if hasattr(vector, "tolist") else list(vector))
+                    for text, vector in zip(texts, vectors)
+                }
+                for text, future, _ in batch:
+                    future.set_result(by_text[text])
+            except Exception as e:
+                logger.error(f"Error embedding a batch of {len(texts)} queries: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            self._record(batch, started, time.monotonic())
+
+    def _record(self, batch: List[tuple], started: float, finished: float):
+        delays = [(started - queued) * 1000.0 for _, _, queued in batch]
+        with self._lock:
+            stats = self._stats
+            stats["requests"] += len(batch)
+            stats["batches"] += 1
+            stats["max_batch_size"] = max(stats["max_batch_size"], len(batch))
+            stats["queue_delay_ms_total"] += sum(delays)
+            stats["queue_delay_ms_max"] = max(stats["queue_delay_ms_max"], max(delays))
+            stats["encode_ms_total"] += (finished - started) * 1000.0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Batch size, queueing delay and model time since start."""
+        with self._lock:
+            stats = dict(self._stats)
+        requests, batches = stats["requests"], stats["batches"]
+        return {
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_batch": self.max_batch,
+            "queued": self._queue.qsize(),
+            "requests": requests,
+            "batches": batches,
+            "avg_batch_size": (requests / batches) if batches else 0.0,
+            "max_batch_size": stats["max_batch_size"],
+            "avg_queue_delay_ms": (stats["queue_delay_ms_total"] / requests) if requests else 0.0,
+            "max_queue_delay_ms": stats["queue_delay_ms_max"],
+            "avg_encode_ms": (stats["encode_ms_total"] / batches) if batches else 0.0,
+        }
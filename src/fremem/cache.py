@@ -0,0 +1,128 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from fremem.util import table_names
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with hit/miss counters.
+
+    A maxsize of 0 disables caching (every lookup is a miss and nothing is stored).
+    """
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = max(0, maxsize)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+def normalize_query(text: str) -> str:
+    """Canonical form for cache lookups: case-folded with collapsed whitespace."""
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingCache:
+    """
+    Persistent content-addressed embedding cache stored as a LanceDB table.
+
+    Rows are keyed by sha256(model name + text), so unchanged chunks are never
+    re-embedded across re-ingests or process restarts.
+    """
+    LOOKUP_BATCH = 1000
+
+    def __init__(self, db, model_name: str, table_name: str = "embedding_cache"):
+        self.db = db
+        self.model_name = model_name
+        self.table_name = table_name
+        self.tbl = None
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        # Another process sharing the store may have created the table since
+        if self.tbl is None and self.table_name in table_names(self.db):
+            self.tbl = self.db.open_table(self.table_name)
+        return self.tbl
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the given keys (missing keys are omitted)."""
+        if not keys or self._open() is None:
+            return {}
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), self.LOOKUP_BATCH):
+            batch = unique[start:start + self.LOOKUP_BATCH]
+            key_list = ", ".join(f"'{k}'" for k in batch)
+            rows = self.tbl.search(None)\
+                .where(f"key IN ({key_list})")\
+                .select(["key", "vector"])\
+                .limit(len(batch))\
+                .to_list()
+            for row in rows:
+                found[row["key"]] = list(row["vector"])
+        return found
+
+    def ensure_index(self) -> Dict[str, str]:
+        """Index the key column so lookups don't scan the whole cache."""
+        if self._open() is None:
+            return {}
+        from fremem.indexing import ensure_scalar_indexes
+        return ensure_scalar_indexes(self.tbl, {"key": "BTREE"})
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """Store vectors for keys that were embedded on a cache miss."""
+        if not items:
+            return
+        data = [{"key": k, "vector": v} for k, v in items.items()]
+        with self._lock:
+            if self._open() is None:
+                self.tbl = self.db.create_table(self.table_name, data=data)
+            else:
+                self.tbl.add(data)
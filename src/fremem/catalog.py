@@ -0,0 +1,165 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from fremem.util import like_escape, sql_str, table_names
+
+logger = logging.getLogger("fremem")
+
+CATALOG_TABLE = "source_catalog"
+# Rows scanned per batch when rebuilding the catalog from the memory tables
+REBUILD_BATCH_ROWS = 8192
+
+CATALOG_SCHEMA = pa.schema([
+    pa.field("project_id", pa.string()),
+    pa.field("source", pa.string()),
+    pa.field("chunk_count", pa.int64()),
+    pa.field("bytes", pa.int64()),
+    pa.field("last_ingested_at", pa.timestamp("ms", tz="UTC")),
+    pa.field("content_hash", pa.string()),
+])
+
+
+def source_deltas(written: Iterable[Tuple[str, str]],
+                  replaced: Iterable[Tuple[str, str]]) -> Dict[str, Tuple[int, int]]:
+    """Per-source (chunk count, bytes) change from (source, text) pairs written and replaced or deleted."""
+    deltas: Dict[str, List[int]] = {}
+    for sign, rows in ((1, written), (-1, replaced)):
+        for source, text in rows:
+            entry = deltas.setdefault(source, [0, 0])
+            entry[0] += sign
+            entry[1] += sign * len((text or "").encode("utf-8"))
+    return {s: (c, b) for s, (c, b) in deltas.items()}
+
+
+class SourceCatalog:
+    """
+    One row per (project_id, source): chunk count, stored text bytes, when it was
+    last written and the content hash of the ingested file.
+
+    Lets source listings and deletes read a table the size of the number of
+    sources instead of scanning every chunk. VectorStore applies the chunk and
+    byte deltas of each write to the entries it touches, under the same project
+    lock as the write, so keeping the catalog current costs O(rows written).
+    """
+    def __init__(self, db, table_name: str = CATALOG_TABLE):
+        self.db = db
+        self.table_name = table_name
+        self._lock = threading.Lock()
+        # True when the table had to be created, i.e. existing memories are not listed yet
+        self.created = table_name not in table_names(db)
+        if self.created:
+            self.tbl = db.create_table(table_name, schema=CATALOG_SCHEMA)
+        else:
+            self.tbl = db.open_table(table_name)
+
+    def _where(self, project_id: str, sources: Iterable[str] = None) -> str:
+        where = f"project_id = {sql_str(project_id)}"
+        if sources is not None:
+            where += f" AND source IN ({', '.join(sql_str(s) for s in sources)})"
+        return where
+
+    def _rows(self, where: str) -> List[Dict[str, Any]]:
+        count = self.tbl.count_rows(where)
+        if not count:
+            return []
+        return self.tbl.search(None).where(where).limit(count).to_list()
+
+    def get(self, project_id: str, source: str) -> Optional[Dict[str, Any]]:
+        rows = self._rows(self._where(project_id, [source]))
+        return rows[0] if rows else None
+
+    def entries(self, project_id: str, prefix: str = None, offset: int = 0,
+                limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Catalog entries of a project sorted by source, optionally filtered by prefix and paginated.
+
+        The prefix filter runs inside LanceDB. Only source names are read to
+        sort and page them; full entries are read for the requested page alone.
+        """
+        where = self._where(project_id)
+        if prefix:
+            where += f" AND source LIKE {sql_str(like_escape(prefix) + '%')} ESCAPE '\\'"
+        count = self.tbl.count_rows(where)
+        if not count:
+            return []
+        names = self.tbl.search(None).where(where).select(["source"]).limit(count).to_list()
+        end = None if limit is None else offset + limit
+        page = sorted(r["source"] for r in names)[offset:end]
+        if not page:
+            return []
+        return sorted(self._rows(self._where(project_id, page)), key=lambda r: r["source"])
+
+    def count(self, project_id: str) -> int:
+        return self.tbl.count_rows(self._where(project_id))
+
+    def update(self, project_id: str, deltas: Dict[str, Tuple[int, int]], content_hash: str = None):
+        """
+        Apply (chunk count, bytes) deltas to the entries of a project's sources.
+
+        Only the entries named in `deltas` are read and written. Sources left
+        with no chunks are removed; `content_hash` replaces the stored hash, which
+        is otherwise kept. Counters drift only if an update is lost, which
+        rebuild() repairs.
+        """
+        deltas = {s: d for s, d in deltas.items() if s}
+        if not deltas:
+            return
+        sources = sorted(deltas)
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            current = {r["source"]: r for r in self._rows(self._where(project_id, sources))}
+            new_rows = []
+            for source in sources:
+                entry = current.get(source) or {}
+                count = (entry.get("chunk_count") or 0) + deltas[source][0]
+                if count <= 0:
+                    continue
+                new_rows.append({
+                    "project_id": project_id,
+                    "source": source,
+                    "chunk_count": count,
+                    "bytes": max(0, (entry.get("bytes") or 0) + deltas[source][1]),
+                    "last_ingested_at": now,
+                    "content_hash": content_hash if content_hash is not None else entry.get("content_hash"),
+                })
+            if new_rows:
+                self.tbl.merge_insert(["project_id", "source"])\
+                    .when_matched_update_all()\
+                    .when_not_matched_insert_all()\
+                    .execute(pa.Table.from_pylist(new_rows, schema=CATALOG_SCHEMA))
+            emptied = [s for s in sources if s in current and s not in {r["source"] for r in new_rows}]
+            if emptied:
+                self.tbl.delete(self._where(project_id, emptied))
+
+    def remove(self, project_id: str, source: str = None):
+        """Drop one source's entry, or every entry of the project."""
+        with self._lock:
+            self.tbl.delete(self._where(project_id, None if source is None else [source]))
+
+    def rebuild(self, data_tables: Iterable[Any]):
+        """Recreate every entry by streaming the memory tables (hashes are not recoverable)."""
+        totals: Dict[tuple, List[int]] = {}
+        for data_tbl in data_tables:
+            for batch in data_tbl.to_lance().to_batches(columns=["project_id", "source", "text"],
+                                                        batch_size=REBUILD_BATCH_ROWS):
+                sizes = pc.binary_length(batch.column("text")).to_pylist()
+                for project_id, source, size in zip(batch.column("project_id").to_pylist(),
+                                                    batch.column("source").to_pylist(), sizes):
+                    if source:
+                        entry = totals.setdefault((project_id, source), [0, 0])
+                        entry[0] += 1
+                        entry[1] += size or 0
+        now = datetime.now(timezone.utc)
+        rows = [
+            {"project_id": p, "source": s, "chunk_count": c, "bytes": b, "last_ingested_at": now, "content_hash": None}
+            for (p, s), (c, b) in totals.items()
+        ]
+        with self._lock:
+            self.tbl = self.db.create_table(self.table_name, data=pa.Table.from_pylist(rows, schema=CATALOG_SCHEMA),
+                                            mode="overwrite")
+        logger.info(f"Rebuilt source catalog: {len(rows)} sources")
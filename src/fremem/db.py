@@ -1,9 +1,29 @@
 import os
+import time
+import hashlib
+import threading
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
 import lancedb
+import pyarrow as pa
 import logging
 import json
-from sentence_transformers import SentenceTransformer
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from fremem.cache import EmbeddingCache, LRUCache, normalize_query
+from fremem.manifest import IngestManifest
+from fremem import indexing
+from fremem import optimize
+from fremem import embeddings
+from fremem.batching import QUERY_BATCH_MAX_SIZE, QUERY_BATCH_WAIT_MS, EmbeddingScheduler
+from fremem.schema import compile_filter, make_row, matches_filter, metadata_like, table_schema
+from fremem.hybrid import looks_like_identifier, rrf_fuse
+from fremem.rerank import RERANK_BUDGET_MS, RERANK_CANDIDATES, Reranker
+from fremem.tables import PROJECT_TABLE_PREFIX, TableRouter, project_table_name
+from fremem import migrations
+from fremem.locking import FileLock, store_lock
+from fremem.catalog import SourceCatalog, source_deltas
+from fremem.util import sql_str, table_names
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,242 +32,966 @@ logger = logging.getLogger("fremem")
 # Constants
 DB_PATH = os.environ.get("MCP_MEMORY_PATH", os.path.join(os.getcwd(), "mcp_memory_data"))
 MODEL_NAME = "all-MiniLM-L6-v2"
+# Embedding sizes of known models, so a new store can be created before the model has loaded
+MODEL_DIMENSIONS = {"all-MiniLM-L6-v2": 384}
+# Number of texts sent to the embedding model per forward pass in bulk paths
+EMBED_BATCH_SIZE = int(os.environ.get("MCP_MEMORY_EMBED_BATCH_SIZE", "64"))
+# In-process LRU cache of query text -> embedding (0 disables)
+QUERY_CACHE_SIZE = int(os.environ.get("MCP_MEMORY_QUERY_CACHE_SIZE", "1024"))
+# Case-fold and collapse whitespace before cache lookup
+QUERY_CACHE_NORMALIZE = os.environ.get("MCP_MEMORY_QUERY_CACHE_NORMALIZE", "0").lower() in ("1", "true", "yes")
+# Persistent content-hash cache of document embeddings (reused across re-ingests)
+EMBEDDING_CACHE = os.environ.get("MCP_MEMORY_EMBEDDING_CACHE", "1").lower() in ("1", "true", "yes")
+# Vector distance metric used for search and the ANN index. Embeddings are
+# L2-normalized, so cosine distance d gives similarity score = 1 - d.
+DISTANCE_METRIC = "cosine"
+# ANN search tuning (only used once an index exists)
+NPROBES = int(os.environ.get("MCP_MEMORY_NPROBES", "20"))
+REFINE_FACTOR = int(os.environ.get("MCP_MEMORY_REFINE_FACTOR", "0")) or None
+# Default search mode: "vector", "keyword" or "hybrid"
+SEARCH_MODE = os.environ.get("MCP_MEMORY_SEARCH_MODE", "vector")
+# Reciprocal-rank fusion weights for hybrid search
+HYBRID_VECTOR_WEIGHT = float(os.environ.get("MCP_MEMORY_HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_KEYWORD_WEIGHT = float(os.environ.get("MCP_MEMORY_HYBRID_KEYWORD_WEIGHT", "1.0"))
+# Hybrid queries that look like identifiers go straight to keyword search
+HYBRID_KEYWORD_FAST_PATH = os.environ.get("MCP_MEMORY_HYBRID_KEYWORD_FAST_PATH", "1").lower() in ("1", "true", "yes")
+# Rerank search results with a cross-encoder by default (see fremem.rerank)
+RERANK = os.environ.get("MCP_MEMORY_RERANK", "0").lower() in ("1", "true", "yes")
+# "shared" keeps every project in memory_store; "per_project" gives each project
+# its own table and moves existing projects out of memory_store in the background
+STORAGE_MODE = os.environ.get("MCP_MEMORY_STORAGE_MODE", "shared").lower()
+# How stale table reads may be when other processes write the store (unset: never re-check)
+READ_CONSISTENCY_SECONDS = float(os.environ["MCP_MEMORY_READ_CONSISTENCY_SECONDS"]) \
+    if os.environ.get("MCP_MEMORY_READ_CONSISTENCY_SECONDS") else None
+# Re-check ANN index health after this many written rows
+INDEX_CHECK_ROWS = int(os.environ.get("MCP_MEMORY_INDEX_CHECK_ROWS", "1000"))
+
+# Runs the vector leg of hybrid searches alongside the keyword leg
+_search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fremem-search")
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 class VectorStore:
     _instance = None
+    _init_lock = threading.Lock()
+    _model_lock = threading.Lock()
+    _model_future = None
+    # Set by enable_query_batching(); search queries are then embedded in micro-batches
+    query_batcher = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(VectorStore, cls).__new__(cls)
             cls._instance.initialized = False
+            # Cross-encoder loads in the background (see warm_up()), never inside a search
+            cls._instance.reranker = Reranker()
         return cls._instance
 
     def initialize(self):
         if self.initialized:
             return
-            
+        # Store calls may arrive concurrently from worker threads
+        with self._init_lock:
+            if not self.initialized:
+                self._initialize()
+
+    def _initialize(self):
         logger.info(f"Initializing VectorStore at {DB_PATH}")
         os.makedirs(DB_PATH, exist_ok=True)
         
-        self.db = lancedb.connect(DB_PATH)
+        self.db_path = DB_PATH
+        # Other processes may write the store; re-check table versions this often
+        interval = timedelta(seconds=READ_CONSISTENCY_SECONDS) if READ_CONSISTENCY_SECONDS is not None else None
+        self.db = lancedb.connect(DB_PATH, read_consistency_interval=interval)
+        # Every commit to the store happens under this lock, shared with other processes
+        self.write_lock = store_lock(DB_PATH, "write")
         
-        # Load embedding model (downloads on first run)
-        logger.info(f"Loading embedding model: {MODEL_NAME}")
-        self.model = SentenceTransformer(MODEL_NAME)
+        # The embedding model loads on first use (or earlier via warm_up()), not here
+        self.query_cache = LRUCache(QUERY_CACHE_SIZE)
+        # Cache keys are tagged so vectors cached before normalization, or by another
+        # backend, are never reused
+        self.embedding_cache = EmbeddingCache(self.db, f"{embeddings.model_id(MODEL_NAME)}:normalized") if EMBEDDING_CACHE else None
         
-        self.table_name = "memory_store"
-        self._ensure_table()
+        # Schema upgrades, table creation and first indexes must not race other processes
+        with self.write_lock:
+            self.table_name = "memory_store"
+            self._ensure_table()
+            self.dim = self.tbl.schema.field("vector").type.list_size
+            self.router = TableRouter(self.db, self.tbl, table_schema(self.dim), STORAGE_MODE,
+                                      write_lock=self.write_lock)
+            self.catalog = SourceCatalog(self.db)
+            if self.catalog.created and any(tbl.count_rows() for tbl in self.router.tables().values()):
+                # Stores written before the catalog existed get it built once
+                logger.info("Building source catalog from existing memories...")
+                self.catalog.rebuild(self.router.tables().values())
+            # Index upkeep state, per table name
+            self._index_locks: Dict[str, FileLock] = {}
+            self._rows_since_index_check: Dict[str, int] = {}
+            self._writes_since_optimize_check: Dict[str, int] = {}
+            self._fts_ready = set()
+            self._fts_building = set()
+            # get_stats table figures, with the table version they describe
+            self._table_details: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+            for tbl in self.router.tables().values():
+                self._ensure_indexes_exist(tbl)
+        if self.router.pending:
+            logger.info(f"Moving {len(self.router.pending)} projects from {self.table_name} to per-project tables")
+            threading.Thread(target=self._migrate_projects, name="fremem-migrate", daemon=True).start()
         self.initialized = True
 
+    def warm_up(self) -> Future:
+        """
+        Start loading the embedding model on a background thread; returns its readiness future.
+
+        Importing sentence_transformers/torch and loading the model takes seconds,
+        so servers call this at startup and answer requests that don't embed
+        anything in the meantime. Calling it again returns the same future,
+        or starts a new load if the last one failed.
+        With reranking on by default, the cross-encoder is warmed up as well.
+        """
+        if RERANK:
+            self.reranker.warm_up()
+        with self._model_lock:
+            if self._model_future is None:
+                self._model_future = Future()
+                threading.Thread(target=self._load_model, args=(self._model_future,),
+                                 name="fremem-model", daemon=True).start()
+            return self._model_future
+
+    def _load_model(self, future: Future):
+        try:
+            future.set_result(embeddings.load_backend(MODEL_NAME))
+        except BaseException as e:
+            # Forget the failed load so the next warm_up() retries it
+            with self._model_lock:
+                if self._model_future is future:
+                    self._model_future = None
+            future.set_exception(e)
+
+    @property
+    def model(self) -> embeddings.EmbeddingBackend:
+        """The embedding backend (see fremem.embeddings); blocks until it has loaded."""
+        return self.warm_up().result()
+
+    @model.setter
+    def model(self, model):
+        future = Future()
+        future.set_result(model)
+        with self._model_lock:
+            self._model_future = future
+
+    def _ensure_indexes_exist(self, tbl):
+        # Existing stores get their filter indexes on first open; later upkeep happens after writes
+        try:
+            missing = [c for c in indexing.SCALAR_INDEXES if indexing.index_stats(tbl, c) is None]
+            lock = self._index_lock(tbl.name)
+            # Runs under the write lock, so only try the index lock (it is taken first
+            # elsewhere); whoever holds it is maintaining this table already
+            if missing and tbl.count_rows() > 0 and lock.acquire(blocking=False):
+                try:
+                    indexing.ensure_scalar_indexes(tbl, {c: indexing.SCALAR_INDEXES[c] for c in missing})
+                finally:
+                    lock.release()
+            if indexing.index_stats(tbl, "text") is not None:
+                self._fts_ready.add(tbl.name)
+            # Stores indexed before the switch to cosine need their ANN index retrained
+            vector_stats = indexing.index_stats(tbl, "vector")
+            if vector_stats and (vector_stats["distance_type"] or DISTANCE_METRIC).lower() != DISTANCE_METRIC:
+                threading.Thread(target=self._maintain_indexes, args=(tbl,), name="fremem-index", daemon=True).start()
+        except Exception as e:
+            logger.warning(f"Could not create scalar indexes: {e}")
+
+    def _migrate_projects(self):
+        self.router.migrate()
+        # Moved projects start without indexes in their new tables
+        self.ensure_indexes()
+
+    def _scope(self, project_id: str, create: bool = False):
+        """
+        (table, clauses) for a project's rows: the table holding the project and the
+        predicates that restrict it to that project. Writers must hold
+        router.lock(project_id) while using the result.
+        """
+        tbl, shared = self.router.resolve(project_id, create=create)
+        return tbl, ([f"project_id = {sql_str(project_id)}"] if shared else [])
+
     def _ensure_table(self):
         # We store: id, vector, text, project_id, source, metadata_json
         # Added 'source' column in v0.2.0 for better governance
+        # Added promoted metadata columns (doc_type, chunk_index, page, tags) in v0.3.0
+        # so metadata filters run inside LanceDB (see fremem.schema)
         
-        tables = self.db.list_tables()
-        if hasattr(tables, "tables"):
-            tables = tables.tables
-            
+        tables = table_names(self.db)
         if self.table_name not in tables:
-            # Create a dummy entry to initialize schema
-            dummy_vector = self.model.encode("init").tolist()
-            schema_data = [{
-                "id": "init_schema", 
-                "vector": dummy_vector, 
-                "text": "init", 
-                "project_id": "system",
-                "source": "system",
-                "metadata_json": "{}"
-            }]
-            self.tbl = self.db.create_table(self.table_name, data=schema_data)
-            self.tbl.delete("id = 'init_schema'")
-        else:
-            self.tbl = self.db.open_table(self.table_name)
-            # Check for schema migration (v0.1.0 -> v0.2.0)
+            dim = MODEL_DIMENSIONS.get(MODEL_NAME) or self.model.dimension
+            self.tbl = self.db.create_table(self.table_name, schema=table_schema(dim))
+            return
+        
+        # Older tables are upgraded in streamed batches (see fremem.migrations)
+        for name in [self.table_name] + sorted(t for t in tables if t.startswith(PROJECT_TABLE_PREFIX)):
             try:
-                # pyarrow schema
-                schema = self.tbl.schema
-                if "source" not in schema.names:
-                    logger.info("Migrating database schema to v0.2.0 (adding 'source' column)...")
-                    # Naive migration: fetch all, drop, recreate
-                    # This is safe-ish for local single-user, provided memory fits
-                    all_data = self.tbl.to_arrow().to_pylist()
-                    
-                    # Transform data
-                    new_data = []
-                    for row in all_data:
-                        # Skip if it's the init schema (shouldn't be there but just in case)
-                        if row['id'] == 'init_schema':
-                            continue
-                            
-                        meta = {}
-                        if 'metadata_json' in row:
-                            try:
-                                meta = json.loads(row['metadata_json'])
-                            except:
-                                pass
-                        
-                        row['source'] = meta.get('source', '')
-                        new_data.append(row)
-                    
-                    # Recreate table
-                    self.db.drop_table(self.table_name)
-                    
-                    if new_data:
-                        self.tbl = self.db.create_table(self.table_name, data=new_data)
-                    else:
-                        # Empty table re-init
-                        dummy_vector = self.model.encode("init").tolist()
-                        schema_data = [{
-                            "id": "init_schema", 
-                            "vector": dummy_vector, 
-                            "text": "init", 
-                            "project_id": "system",
-                            "source": "system",
-                            "metadata_json": "{}"
-                        }]
-                        self.tbl = self.db.create_table(self.table_name, data=schema_data)
-                        self.tbl.delete("id = 'init_schema'")
-                        
-                    logger.info(f"Migration complete. {len(new_data)} records updated.")
+                migrations.migrate_table(self.db, self.db_path, name)
             except Exception as e:
-                logger.error(f"Error checking/migrating schema: {e}")
+                logger.error(f"Error migrating schema of table '{name}': {e}")
+        self.tbl = self.db.open_table(self.table_name)
+
+    def embed_documents(self, texts: List[str], batch_size: int = None) -> List[List[float]]:
+        """Embed document texts, skipping the model for texts already in the embedding cache."""
+        if self.embedding_cache is None:
+            vectors = self.model.encode(texts, batch_size=batch_size or EMBED_BATCH_SIZE, normalize_embeddings=True)
+            return [v.tolist() for v in vectors]
+
+        keys = [self.embedding_cache.key(t) for t in texts]
+        cached = self.embedding_cache.get_many(keys)
+
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.model.encode(list(missing.values()), batch_size=batch_size or EMBED_BATCH_SIZE, normalize_embeddings=True)
+            fresh = {key: v.tolist() for key, v in zip(missing.keys(), vectors)}
+            try:
+                with self.write_lock:
+                    self.embedding_cache.put_many(fresh)
+                self._after_cache_write(len(fresh))
+            except Exception as e:
+                logger.warning(f"Could not update embedding cache: {e}")
+            cached.update(fresh)
+
+        logger.debug(f"Embedding cache: {len(texts) - len(missing)}/{len(texts)} hits")
+        return [cached[key] for key in keys]
 
     def add(self, project_id: str, doc_id: str, text: str, meta: Dict[str, Any] = None):
         self.initialize()
         
         logger.info(f"Adding document {doc_id} to project {project_id}")
-        vector = self.model.encode(text).tolist()
-        meta = meta or {}
-        # Extract source from meta if present, otherwise default to empty
-        source = meta.get("source", "")
-        
-        data = [{
-            "id": doc_id,
-            "vector": vector,
-            "text": text,
-            "project_id": project_id,
-            "source": source,
-            "metadata_json": json.dumps(meta)
-        }]
+        vector = self.embed_documents([text])[0]
+        # Source and other well-known keys are promoted to columns from meta
+        data = [make_row(project_id, doc_id, text, vector, meta or {})]
         
+        with self.router.lock(project_id):
+            tbl, scope = self._scope(project_id, create=True)
+            # The ID may move from another source, whose entry then changes too
+            replaced = self._stored_texts(tbl, scope, [doc_id])
+            # Update if exists
+            self._upsert(tbl, data, shared=bool(scope))
+            self._update_catalog(project_id, source_deltas([(data[0]["source"], text)], replaced))
+        self._after_write(tbl, 1)
+
+    def add_many(self, project_id: str, records: List[Dict[str, Any]], batch_size: int = None) -> int:
+        """
+        Add or update many documents in a single write.
+
+        Each record is a dict with 'id', 'text', optional 'meta' and optional
+        precomputed 'vector'. Texts are embedded in batches of `batch_size` and
+        all rows are committed with one upsert. Returns the number of rows written.
+        """
+        self.initialize()
+        if not records:
+            return 0
+
+        # Last occurrence wins if the same ID appears twice in one batch
+        unique = {}
+        for rec in records:
+            unique[rec["id"]] = rec
+        records = list(unique.values())
+
+        logger.info(f"Adding {len(records)} documents to project {project_id}")
+        to_embed = [rec["text"] for rec in records if rec.get("vector") is None]
+        embedded = iter(self.embed_documents(to_embed, batch_size=batch_size) if to_embed else [])
+        vectors = [rec["vector"] if rec.get("vector") is not None else next(embedded) for rec in records]
+
+        data = [
+            make_row(project_id, rec["id"], rec["text"], vector, rec.get("meta") or {})
+            for rec, vector in zip(records, vectors)
+        ]
+
         # Update if exists
+        with self.router.lock(project_id):
+            tbl, scope = self._scope(project_id, create=True)
+            replaced = self._stored_texts(tbl, scope, [row["id"] for row in data])
+            self._upsert(tbl, data, shared=bool(scope))
+            self._update_catalog(project_id, source_deltas([(row["source"], row["text"]) for row in data], replaced))
+        self._after_write(tbl, len(data))
+        return len(data)
+
+    def _upsert(self, tbl, data: List[Dict[str, Any]], shared: bool = True):
+        """
+        Insert rows, replacing stored rows with the same key, in a single commit.
+
+        Old rows stay visible until the new ones are committed. The join runs on
+        one BTREE-indexed column, so it is served by the index instead of a
+        scan: row_key (project_id + id) in the shared table, id in a project's
+        own table, which only holds that project.
+        """
+        on = "row_key" if shared else "id"
+        tbl.merge_insert(on)\
+            .when_matched_update_all()\
+            .when_not_matched_insert_all()\
+            .execute(pa.Table.from_pylist(data, schema=tbl.schema))
+
+    def _stored_texts(self, tbl, scope: List[str], ids: List[str], batch: int = 1000) -> List[tuple]:
+        """(source, text) of the stored rows with these IDs, i.e. what a write or delete of them replaces."""
+        stored = []
+        for start in range(0, len(ids), batch):
+            chunk = ids[start:start + batch]
+            id_list = ", ".join(sql_str(i) for i in chunk)
+            rows = tbl.search(None)\
+                .where(" AND ".join(scope + [f"id IN ({id_list})"]))\
+                .select(["source", "text"])\
+                .limit(len(chunk))\
+                .to_list()
+            stored.extend((r["source"], r["text"]) for r in rows)
+        return stored
+
+    def _update_catalog(self, project_id: str, deltas: Dict[str, tuple], content_hash: str = None):
+        # Runs under the project's write lock right after the data commit; the catalog
+        # is derived data, so a failure here is logged and repaired by rebuild_catalog()
         try:
-            self.tbl.delete(f"id = '{doc_id}' AND project_id = '{project_id}'")
-        except Exception:
-            pass 
-            
-        self.tbl.add(data)
+            self.catalog.update(project_id, deltas, content_hash=content_hash)
+        except Exception as e:
+            logger.error(f"Error updating source catalog for project {project_id}: {e}")
+
+    def record_source(self, project_id: str, source: str, content_hash: str):
+        """Refresh a source's catalog entry and store the hash of the file it was ingested from."""
+        self.initialize()
+        with self.router.lock(project_id):
+            self._update_catalog(project_id, {source: (0, 0)}, content_hash=content_hash)
+
+    def rebuild_catalog(self):
+        """Recreate the source catalog from the stored memories."""
+        self.initialize()
+        with self.write_lock:
+            self.catalog.rebuild(self.router.tables().values())
+
+    def _after_write(self, tbl, num_rows: int):
+        """
+        Check a table's health in the background: its indexes once enough rows have
+        been written to it, its fragments once enough write commits have piled up.
+        """
+        writes = self._writes_since_optimize_check.get(tbl.name, 0) + 1
+        if writes >= optimize.OPTIMIZE_CHECK_WRITES:
+            self._writes_since_optimize_check[tbl.name] = 0
+            threading.Thread(target=self._optimize_table, args=(tbl,), name="fremem-optimize", daemon=True).start()
+            return
+        self._writes_since_optimize_check[tbl.name] = writes
         
-    def search(self, project_id: str, query: str, k: int = 5, filter_meta: Dict[str, Any] = None, min_score: float = None) -> List[Dict[str, Any]]:
+        count = self._rows_since_index_check.get(tbl.name, 0) + num_rows
+        if count < INDEX_CHECK_ROWS:
+            self._rows_since_index_check[tbl.name] = count
+            return
+        self._rows_since_index_check[tbl.name] = 0
+        threading.Thread(target=self._maintain_indexes, args=(tbl,), name="fremem-index", daemon=True).start()
+
+    def _after_cache_write(self, num_rows: int):
+        """Fold new embedding-cache rows into its key index in the background, like _after_write."""
+        name = self.embedding_cache.table_name
+        count = self._rows_since_index_check.get(name, 0) + num_rows
+        if count < INDEX_CHECK_ROWS:
+            self._rows_since_index_check[name] = count
+            return
+        self._rows_since_index_check[name] = 0
+        threading.Thread(target=self._maintain_cache_index, name="fremem-index", daemon=True).start()
+
+    def _build_fts_later(self, tbl):
+        """Build a table's full-text index on a background thread, one build per table at a time."""
+        if tbl.name in self._fts_building:
+            return
+        self._fts_building.add(tbl.name)
+        threading.Thread(target=self._build_fts, args=(tbl,), name="fremem-fts", daemon=True).start()
+
+    def _build_fts(self, tbl, blocking: bool = False):
+        lock = self._index_lock(tbl.name)
+        # If a maintenance pass holds the lock, it builds the index itself
+        if lock.acquire(blocking=blocking):
+            try:
+                # The table may have been dropped while this build waited to start
+                if tbl.name in table_names(self.db):
+                    indexing.ensure_fts_index(tbl)
+                    if indexing.index_stats(tbl, "text") is not None:
+                        self._fts_ready.add(tbl.name)
+            except Exception as e:
+                logger.error(f"Error building full-text index on {tbl.name}: {e}")
+            finally:
+                lock.release()
+        self._fts_building.discard(tbl.name)
+
+    def _index_lock(self, name: str) -> FileLock:
+        # Shared with other processes, so only one of them maintains a table at a time
+        lock = self._index_locks.get(name)
+        if lock is None:
+            lock = self._index_locks.setdefault(name, store_lock(self.db_path, f"index-{name}"))
+        return lock
+
+    def ensure_indexes(self, force: bool = False, project_id: str = None) -> Dict[str, str]:
+        """
+        Maintain the scalar indexes, the full-text index on text and the ANN
+        index (see fremem.indexing). Returns the action taken per index. Waits
+        for a background build already running on a table instead of skipping it.
+
+        In per-project storage every table is maintained on its own and the
+        actions are keyed "<table>/<index>"; pass `project_id` to maintain a
+        single project's table.
+        """
         self.initialize()
+        if project_id is not None:
+            tbl, _ = self._scope(project_id)
+            results = self._maintain_indexes(tbl, force, wait=True) if tbl is not None else {}
+        elif self.router.mode == "shared":
+            results = self._maintain_indexes(self.tbl, force, wait=True)
+        else:
+            results = {}
+            for name, tbl in self.router.tables().items():
+                for index, action in self._maintain_indexes(tbl, force, wait=True).items():
+                    results[f"{name}/{index}"] = action
+        if self.embedding_cache is not None:
+            self._maintain_cache_index(wait=True)
+        return results
+
+    def _maintain_indexes(self, tbl, force: bool = False, wait: bool = False) -> Dict[str, str]:
+        lock = self._index_lock(tbl.name)
+        # Background passes skip a table another build is running on; explicit calls wait for it
+        if not lock.acquire(blocking=force or wait):
+            return {"vector": "skipped (build in progress)"}
+        try:
+            # Project tables are dropped under this lock; skip one that went while we waited
+            if tbl.name not in table_names(self.db):
+                return {}
+            # Index commits are rebased onto concurrent writes, so writes never wait for a build
+            return self._update_indexes(tbl, force)
+        finally:
+            lock.release()
+
+    def _maintain_cache_index(self, wait: bool = False) -> Dict[str, str]:
+        lock = self._index_lock(self.embedding_cache.table_name)
+        if not lock.acquire(blocking=wait):
+            return {"key": "skipped (build in progress)"}
+        try:
+            return self.embedding_cache.ensure_index()
+        except Exception as e:
+            logger.error(f"Error maintaining embedding cache index: {e}")
+            return {"key": f"error: {e}"}
+        finally:
+            lock.release()
+
+    def _update_indexes(self, tbl, force: bool = False) -> Dict[str, str]:
+        # Caller holds the table's index lock
+        results = {}
+        try:
+            results.update(indexing.ensure_scalar_indexes(tbl, force=force))
+        except Exception as e:
+            logger.error(f"Error maintaining scalar indexes: {e}")
+            results["scalar"] = f"error: {e}"
+        try:
+            results["text"] = indexing.ensure_fts_index(tbl, force=force)
+            if indexing.index_stats(tbl, "text") is not None:
+                self._fts_ready.add(tbl.name)
+        except Exception as e:
+            logger.error(f"Error maintaining full-text index: {e}")
+            results["text"] = f"error: {e}"
+        try:
+            results["vector"] = indexing.ensure_vector_index(tbl, self.dim, DISTANCE_METRIC, force=force)
+        except Exception as e:
+            logger.error(f"Error maintaining vector index: {e}")
+            results["vector"] = f"error: {e}"
+        return results
+
+    def optimize(self, force: bool = False, project_id: str = None) -> Dict[str, str]:
+        """
+        Compact fragmented tables, prune old versions and refresh their indexes
+        (see fremem.optimize). Tables are only compacted past the fragment or
+        deleted-row thresholds unless `force` is set. Returns the action taken
+        per step, keyed "<table>/<step>".
+        """
+        self.initialize()
+        if project_id is not None:
+            tbl, _ = self._scope(project_id)
+            tables = {tbl.name: tbl} if tbl is not None else {}
+        else:
+            tables = self.router.tables()
+        results = {}
+        for name, tbl in tables.items():
+            for step, action in self._optimize_table(tbl, force).items():
+                results[f"{name}/{step}"] = action
+        if project_id is None:
+            # The embedding cache and source catalog are written by every ingest, so they fragment too
+            aux = [self.catalog.tbl]
+            if self.embedding_cache is not None and self.embedding_cache.tbl is not None:
+                aux.append(self.embedding_cache.tbl)
+            for tbl in aux:
+                try:
+                    # Background key-index builds take the same lock; compaction would conflict with them
+                    with self._index_lock(tbl.name):
+                        actions = optimize.optimize_table(tbl, force, commit_lock=self.write_lock)
+                    for step, action in actions.items():
+                        results[f"{tbl.name}/{step}"] = action
+                except Exception as e:
+                    logger.error(f"Error optimizing {tbl.name}: {e}")
+                    results[f"{tbl.name}/compact"] = f"error: {e}"
+        return results
+
+    def _optimize_table(self, tbl, force: bool = False) -> Dict[str, str]:
+        lock = self._index_lock(tbl.name)
+        # Compaction and index builds on the same table take turns; searches never wait
+        if not lock.acquire(blocking=force):
+            return {"compact": "skipped (maintenance in progress)"}
+        try:
+            if tbl.name not in table_names(self.db):
+                return {"compact": "skipped (table dropped)"}
+            # Only the compaction commit conflicts with writes, so only it takes the write lock
+            results = optimize.optimize_table(tbl, force=force, commit_lock=self.write_lock)
+            if "cleanup" in results:
+                # Compaction can push the unindexed tail past the rebuild threshold
+                for index, action in self._update_indexes(tbl).items():
+                    results[f"index:{index}"] = action
+            return results
+        except Exception as e:
+            logger.error(f"Error optimizing table {tbl.name}: {e}")
+            return {"compact": f"error: {e}"}
+        finally:
+            # Pruned versions shrink the table on disk without a new version
+            self._table_details.pop(tbl.name, None)
+            lock.release()
+
+    def delete_ids(self, project_id: str, ids: List[str], batch: int = 1000):
+        """Delete specific documents of a project by ID."""
+        self.initialize()
+        with self.router.lock(project_id):
+            tbl, scope = self._scope(project_id)
+            if tbl is None or not ids:
+                return
+            removed = self._stored_texts(tbl, scope, ids, batch)
+            for start in range(0, len(ids), batch):
+                id_list = ", ".join(sql_str(i) for i in ids[start:start + batch])
+                tbl.delete(" AND ".join(scope + [f"id IN ({id_list})"]))
+            self._update_catalog(project_id, source_deltas([], removed))
+
+    def source_index(self, project_id: str, source: str) -> Dict[str, Dict[str, str]]:
+        """Map each stored chunk ID of a source to its text hash and metadata JSON."""
+        self.initialize()
+        tbl, scope = self._scope(project_id)
+        if tbl is None:
+            return {}
+        where = " AND ".join(scope + [f"source = {sql_str(source)}"])
+        count = tbl.count_rows(where)
+        if not count:
+            return {}
+        rows = tbl.search(None)\
+            .where(where)\
+            .select(["id", "text", "metadata_json"])\
+            .limit(count)\
+            .to_list()
+        return {
+            r["id"]: {"text_hash": _text_hash(r["text"]), "metadata_json": r["metadata_json"]}
+            for r in rows
+        }
+
+    def diff_records(self, project_id: str, index: Dict[str, Dict[str, str]], records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return the records that differ from the stored rows described by `index`.
+
+        Records whose text already exists under another stored ID (e.g. after
+        chunks shift) carry that row's vector so they are not re-embedded.
+        """
+        to_write = []
+        for rec in records:
+            old = index.get(rec["id"])
+            if old and old["text_hash"] == _text_hash(rec["text"]) and old["metadata_json"] == json.dumps(rec.get("meta") or {}):
+                continue
+            to_write.append(dict(rec))
+
+        # Reuse vectors of stored rows whose text moved to a different ID
+        hash_to_id = {}
+        for doc_id, row in index.items():
+            hash_to_id.setdefault(row["text_hash"], doc_id)
+        reuse = {}
+        for rec in to_write:
+            doc_id = hash_to_id.get(_text_hash(rec["text"]))
+            if doc_id is not None:
+                reuse.setdefault(doc_id, []).append(rec)
+        if reuse:
+            tbl, scope = self._scope(project_id)
+            id_list = ", ".join(sql_str(i) for i in reuse)
+            rows = tbl.search(None)\
+                .where(" AND ".join(scope + [f"id IN ({id_list})"]))\
+                .select(["id", "vector"])\
+                .limit(len(reuse))\
+                .to_list()
+            for row in rows:
+                for rec in reuse.get(row["id"], []):
+                    rec["vector"] = list(row["vector"])
+        return to_write
+
+    def diff_source(self, project_id: str, source: str, records: List[Dict[str, Any]]):
+        """
+        Compare freshly chunked records for a source with the rows already stored.
+
+        Returns (to_write, stale_ids, unchanged): records that are new or changed,
+        IDs of stored rows that no longer exist, and the number of rows left untouched.
+        """
+        index = self.source_index(project_id, source)
+        to_write = self.diff_records(project_id, index, records)
+        wanted = set(rec["id"] for rec in records)
+        stale_ids = [i for i in index if i not in wanted]
+        return to_write, stale_ids, len(records) - len(to_write)
+
+    def replace_source(self, project_id: str, source: str, records: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Make the stored chunks of `source` match `records`, touching only what changed.
+
+        Unchanged rows keep their vectors and are not rewritten; vanished chunks are deleted.
+        """
+        to_write, stale_ids, unchanged = self.diff_source(project_id, source, records)
+        written = self.add_many(project_id, to_write)
+        # Delete after writing so the source never disappears mid-update
+        if stale_ids:
+            self.delete_ids(project_id, stale_ids)
+        return {"written": written, "deleted": len(stale_ids), "unchanged": unchanged}
         
-        query_vec = self.model.encode(query).tolist()
+    def _encode_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing cached vectors for repeated queries."""
+        key = normalize_query(query) if QUERY_CACHE_NORMALIZE else query
+        vector = self.query_cache.get(key)
+        if vector is None:
+            if self.query_batcher is not None:
+                vector = self.query_batcher.encode(query)
+            else:
+                vector = self.model.encode(query, normalize_embeddings=True).tolist()
+            self.query_cache.put(key, vector)
+        return vector
+
+    def enable_query_batching(self, max_wait_ms: float = None, max_batch: int = None) -> EmbeddingScheduler:
+        """
+        Embed concurrent search queries together (see fremem.batching.EmbeddingScheduler).
+
+        Worth it when many clients search at once, as behind the HTTP server;
+        each query waits at most `max_wait_ms` for others to join its batch.
+        """
+        def encode_batch(texts: List[str]):
+            return self.model.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+        self.query_batcher = EmbeddingScheduler(
+            encode_batch,
+            max_batch=QUERY_BATCH_MAX_SIZE if max_batch is None else max_batch,
+            max_wait_ms=QUERY_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms,
+        )
+        return self.query_batcher
+
+    def search(self, project_id: str, query: str, k: int = 5, filter_meta: Dict[str, Any] = None, min_score: float = None,
+               nprobes: int = None, refine_factor: int = None, max_distance: float = None, mode: str = None,
+               vector_weight: float = None, keyword_weight: float = None, rerank: bool = None,
+               rerank_budget_ms: float = None) -> List[Dict[str, Any]]:
+        """
+        Best chunks of a project for `query`, best first.
+
+        mode is "vector" (default), "keyword" (BM25 full-text) or "hybrid" (both
+        legs run concurrently and are fused with weighted reciprocal-rank fusion).
+        In hybrid mode, identifier-looking queries take a keyword-only fast path
+        that skips model inference.
+
+        Vector results carry `_distance` (cosine distance) and `score` (similarity
+        in 0..1). `min_score` and `max_distance` bound the distance inside the
+        query, so results past the threshold are never fetched.
+
+        With `rerank`, RERANK_CANDIDATES results are fetched and re-scored by a
+        cross-encoder (rows gain `rerank_score`), unless that would exceed
+        `rerank_budget_ms`, in which case the first-stage order is kept.
+        """
+        started = time.monotonic()
+        self.initialize()
+        rerank = RERANK if rerank is None else rerank
+        if not rerank:
+            return self._retrieve(project_id, query, k, filter_meta, min_score, nprobes, refine_factor,
+                                  max_distance, mode, vector_weight, keyword_weight)
         
-        # We fetch more results if filtering is active to ensure we return 'k' after filtering
-        fetch_k = k * 3 if filter_meta else k
+        candidates = self._retrieve(project_id, query, max(k, RERANK_CANDIDATES), filter_meta,
+                                    min_score, nprobes, refine_factor, max_distance, mode, vector_weight,
+                                    keyword_weight)
+        budget_ms = RERANK_BUDGET_MS if rerank_budget_ms is None else rerank_budget_ms
+        try:
+            # Any write bumps the version, so cached scores never outlive the rows they were computed for
+            tbl = self._scope(project_id)[0]
+            version = (tbl.name, tbl.version)
+        except Exception:
+            version = None
+        return self.reranker.rerank(query, candidates, k, version=version, deadline=started + budget_ms / 1000.0)
+
+    def _retrieve(self, project_id: str, query: str, k: int, filter_meta: Dict[str, Any], min_score: float,
+                  nprobes: int, refine_factor: int, max_distance: float, mode: str, vector_weight: float,
+                  keyword_weight: float) -> List[Dict[str, Any]]:
+        """First-stage retrieval for search()."""
+        mode = (mode or SEARCH_MODE).lower()
+        if mode not in ("vector", "keyword", "hybrid"):
+            raise ValueError(f"Unknown search mode: {mode}")
         
-        results = self.tbl.search(query_vec)\
-            .where(f"project_id = '{project_id}'")\
-            .limit(fetch_k)\
-            .to_list()
-            
-        final_results = []
-        for res in results:
-            # Parse metadata
-            meta = {}
-            if 'metadata_json' in res:
-                try:
-                    meta = json.loads(res['metadata_json'])
-                except:
-                    pass
-            res['metadata'] = meta
-            
-            # Distance is usually returned by LanceDB (L2 or Cosine depending on config, default L2 usually but transformer models use cosine similarity often normalized)
-            # Actually SentenceTransformers produce normalized vectors, so Inner Product = Cosine Similarity.
-            # LanceDB default metric is L2. 
-            # Low L2 = High Similarity. 
-            # _distance is returned.
-            # To be more useful, let's keep _distance but also provide a 'score' if possible?
-            # For now, we just pass _distance through.
+        args = (query, k, filter_meta, min_score, nprobes, refine_factor, max_distance, mode,
+                vector_weight, keyword_weight)
+        tbl, scope = self._scope(project_id)
+        if tbl is None:
+            return []
+        try:
+            return self._retrieve_from(tbl, scope, *args)
+        except Exception:
+            # The cached handle may point at a table another process dropped or recreated
+            if not self.router.evict(tbl.name):
+                raise
+            tbl, scope = self._scope(project_id)
+            if tbl is None:
+                return []
+            return self._retrieve_from(tbl, scope, *args)
+
+    def _retrieve_from(self, tbl, scope: List[str], query: str, k: int, filter_meta: Dict[str, Any],
+                       min_score: float, nprobes: int, refine_factor: int, max_distance: float, mode: str,
+                       vector_weight: float, keyword_weight: float) -> List[Dict[str, Any]]:
+        # Metadata filters are compiled into the LanceDB prefilter (see fremem.schema);
+        # only keys without a typed column still need a check in Python
+        clauses, exact = compile_filter(filter_meta)
+        where = " AND ".join(scope + clauses) or None
+        
+        vector_args = (tbl, query, where, k, exact, filter_meta, min_score, max_distance, nprobes, refine_factor)
+        if mode == "keyword":
+            results = self._keyword_search(tbl, query, where, k, exact, filter_meta)
+            # No full-text index yet (it is being built in the background): answer semantically
+            return results if results is not None else self._vector_search(*vector_args)
+        if mode == "vector":
+            return self._vector_search(*vector_args)
+        
+        if HYBRID_KEYWORD_FAST_PATH and looks_like_identifier(query):
+            results = self._keyword_search(tbl, query, where, k, exact, filter_meta)
+            if results:
+                return results
+        
+        # Run the keyword and ANN legs concurrently, then fuse by rank
+        vector_future = _search_pool.submit(self._vector_search, *vector_args)
+        keyword_results = self._keyword_search(tbl, query, where, k, exact, filter_meta)
+        vector_results = vector_future.result()
+        if keyword_results is None:
+            return vector_results
+        weights = (
+            HYBRID_VECTOR_WEIGHT if vector_weight is None else vector_weight,
+            HYBRID_KEYWORD_WEIGHT if keyword_weight is None else keyword_weight,
+        )
+        return rrf_fuse([vector_results, keyword_results], weights, k)
+
+    def _filtered(self, run_query, k: int, exact: bool, filter_meta: Dict[str, Any], distance_bound: float = None) -> List[Dict[str, Any]]:
+        """
+        Run `run_query(limit)` and keep rows matching `filter_meta`.
+
+        If some filter keys can't be pushed down exactly, over-fetch and grow until
+        k matches are found or the candidates are exhausted.
+        """
+        fetch_k = k if exact else k * 3
+        while True:
+            results = run_query(fetch_k)
             
-            # Filter
-            if filter_meta:
-                match = True
-                for key, val in filter_meta.items():
-                    if meta.get(key) != val:
-                        match = False
-                        break
-                if not match:
+            final_results = []
+            for res in results:
+                # Parse metadata
+                meta = {}
+                if 'metadata_json' in res:
+                    try:
+                        meta = json.loads(res['metadata_json'])
+                    except:
+                        pass
+                res['metadata'] = meta
+                
+                # Cosine distance on normalized vectors: 0 = identical, 1 = unrelated
+                distance = res.get('_distance')
+                if distance is not None:
+                    # Results are ordered by distance, so the first one past the bound ends the list
+                    # (only reachable on LanceDB versions without distance_range)
+                    if distance_bound is not None and distance > distance_bound:
+                        return final_results
+                    res['score'] = min(1.0, max(0.0, 1.0 - distance))
+                
+                if not exact and not matches_filter(meta, filter_meta):
                     continue
-            
-            # Score filter (Assuming _distance is L2, smaller is better. If we want min_score (similarity), we need conversion.
-            # For this iteration, let's expose _distance and let user decide, or convert if we knew metric.
-            # Let's assume user passes min_score as max_distance for L2? Or just raw distance filter?
-            # "Similarity score" usually means 0..1. 
-            # Let's stick to returning them and filtering if provided, assuming 'score' is roughly (1 - distance) or similar for normalized vectors, but simpler to just return distance for v0.2.
-            # Actually, standard is: score = 1 - (distance / 2) for L2 on normalized... 
-            # Let's just implement metadata filtering effectively first.
-            
-            final_results.append(res)
-            if len(final_results) >= k:
-                break
                 
-        return final_results
+                final_results.append(res)
+                if len(final_results) >= k:
+                    break
+            
+            # Done once we have k results or the candidates are exhausted
+            if len(final_results) >= k or len(results) < fetch_k:
+                return final_results
+            fetch_k *= 4
+
+    def _vector_search(self, tbl, query: str, where: Optional[str], k: int, exact: bool, filter_meta: Dict[str, Any],
+                       min_score: float, max_distance: float, nprobes: int, refine_factor: int) -> List[Dict[str, Any]]:
+        query_vec = self._encode_query(query)
+        
+        # min_score is a similarity; express both thresholds as one distance bound
+        bounds = [b for b in (max_distance, None if min_score is None else 1.0 - min_score) if b is not None]
+        distance_bound = min(bounds) if bounds else None
+        
+        def run_query(limit):
+            # nprobes/refine_factor only matter once an ANN index exists
+            query_builder = tbl.search(query_vec)\
+                .distance_type(DISTANCE_METRIC.lower())\
+                .nprobes(nprobes or NPROBES)
+            if refine_factor or REFINE_FACTOR:
+                query_builder = query_builder.refine_factor(refine_factor or REFINE_FACTOR)
+            if distance_bound is not None and hasattr(query_builder, "distance_range"):
+                query_builder = query_builder.distance_range(upper_bound=distance_bound)
+            # Prefilter so the scalar indexes narrow the candidates before the ANN search
+            if where:
+                query_builder = query_builder.where(where, prefilter=True)
+            return query_builder.limit(limit).to_list()
+        
+        return self._filtered(run_query, k, exact, filter_meta, distance_bound)
+
+    def _keyword_search(self, tbl, query: str, where: Optional[str], k: int, exact: bool,
+                        filter_meta: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        BM25 full-text search over chunk text; rows carry the keyword `_score`.
+
+        Returns None while the table has no full-text index. Reads never build
+        it or wait for index locks; the build is started in the background.
+        """
+        if tbl.name not in self._fts_ready:
+            # Built by a maintenance pass or another process since
+            if indexing.index_stats(tbl, "text") is None:
+                self._build_fts_later(tbl)
+                return None
+            self._fts_ready.add(tbl.name)
+        
+        def run_query(limit):
+            query_builder = tbl.search(query, query_type="fts")
+            if where:
+                query_builder = query_builder.where(where, prefilter=True)
+            return query_builder.limit(limit).to_list()
+        
+        try:
+            return self._filtered(run_query, k, exact, filter_meta)
+        except Exception as e:
+            logger.error(f"Keyword search failed: {e}")
+            return []
 
-    def list_sources(self, project_id: str) -> List[str]:
+    def list_sources(self, project_id: str, prefix: str = None, offset: int = 0, limit: int = None) -> List[str]:
+        """Sources of a project in sorted order, read from the source catalog."""
+        return [entry["source"] for entry in self.source_catalog(project_id, prefix, offset, limit)]
+
+    def source_catalog(self, project_id: str, prefix: str = None, offset: int = 0,
+                       limit: int = None) -> List[Dict[str, Any]]:
+        """Catalog entries (source, chunk_count, bytes, last_ingested_at, content_hash) of a project."""
         self.initialize()
         try:
-            # LanceDB SQL support varies by version/backend. 
-            # If 'source' column exists, we can query it.
-            # If strictly using Arrow, we can fetch all and distinct in python (ok for small-medium scale)
-            # or use projection.
-            
-            # Efficient approach: Fetch only 'source' column for project
-            # .search(None) -> no vector search, just filter
-            results = self.tbl.search(None)\
-                .where(f"project_id = '{project_id}'")\
-                .select(["source"])\
-                .limit(10000)\
-                .to_list()
-                
-            sources = set(r["source"] for r in results if r.get("source"))
-            return sorted(list(sources))
+            entries = self.catalog.entries(project_id, prefix=prefix, offset=offset, limit=limit)
         except Exception as e:
             logger.error(f"Error listing sources: {e}")
             return []
+        return [
+            {
+                "source": e["source"],
+                "chunk_count": e["chunk_count"],
+                "bytes": e["bytes"],
+                "last_ingested_at": e["last_ingested_at"].isoformat() if e["last_ingested_at"] else None,
+                "content_hash": e["content_hash"],
+            }
+            for e in entries
+        ]
 
     def delete_source(self, project_id: str, source: str) -> bool:
         self.initialize()
         logger.info(f"Deleting source '{source}' for project {project_id}")
-        try:
-            # If source column exists
-            self.tbl.delete(f"project_id = '{project_id}' AND source = '{source}'")
-            return True
-        except Exception as e:
-            logger.error(f"Error deleting source {source}: {e}")
-            # Fallback: try deleting by metadata_json if schema upgrade didn't happen
+        with self.router.lock(project_id):
+            tbl, scope = self._scope(project_id)
+            IngestManifest.remove(self.db_path, project_id, source)
             try:
-                # This is risky/slow but a fallback
-                self.tbl.delete(f"project_id = '{project_id}' AND metadata_json LIKE '%\"source\": \"{source}\"%'")
-                return True
-            except:
-                return False
+                # The catalog is derived data and may be stale, so always delete the rows themselves
+                removed = 0
+                if tbl is not None:
+                    where = " AND ".join(scope + [f"source = {sql_str(source)}"])
+                    before = tbl.count_rows(where)
+                    if before:
+                        tbl.delete(where)
+                        removed = before - tbl.count_rows(where)
+                try:
+                    self.catalog.remove(project_id, source)
+                except Exception as e:
+                    logger.error(f"Error updating source catalog for project {project_id}: {e}")
+                return removed > 0
+            except Exception as e:
+                logger.error(f"Error deleting source {source}: {e}")
+                # Fallback: try deleting by metadata_json if schema upgrade didn't happen
+                try:
+                    # This is risky/slow but a fallback
+                    tbl.delete(" AND ".join(scope + [metadata_like("source", source)]))
+                    return True
+                except:
+                    return False
 
     def get_stats(self, project_id: str) -> Dict[str, Any]:
+        """
+        Chunk and source counts of a project plus storage details of its table.
+
+        The chunk count is pushed down to LanceDB (served from metadata and the
+        scalar indexes) and the source count comes from the source catalog, so
+        no rows are materialized. The `table` figures walk the table's files
+        and index statistics, so they are cached until the table's version
+        changes. In shared storage they describe the table all projects share.
+        """
         self.initialize()
         try:
+            tbl, scope = self._scope(project_id)
+            if tbl is None:
+                return {"chunk_count": 0, "source_count": 0, "table": None}
+            where = " AND ".join(scope) or None
             # Count chunks
-            count = self.tbl.search(None).where(f"project_id = '{project_id}'").limit(100000).to_arrow().num_rows
-            return {"chunk_count": count}
+            count = tbl.count_rows(where)
+            return {
+                "chunk_count": count,
+                "source_count": self.catalog.count(project_id),
+                "table": self._table_stats(tbl),
+            }
         except Exception as e:
             logger.error(f"Error getting stats: {e}")
             return {"chunk_count": 0, "error": str(e)}
 
+    def _table_stats(self, tbl) -> Dict[str, Any]:
+        version = tbl.version
+        cached = self._table_details.get(tbl.name)
+        if cached is not None and cached[0] == version:
+            return dict(cached[1])
+        health = optimize.table_health(tbl)
+        vector_index = indexing.index_stats(tbl, "vector")
+        details = {
+            "name": tbl.name,
+            "version": version,
+            "num_rows": health["num_rows"],
+            "num_fragments": health["num_fragments"],
+            "num_deleted_rows": health["num_deleted_rows"],
+            "bytes_on_disk": optimize.disk_usage(tbl),
+            "indexed_rows": vector_index["num_indexed_rows"] if vector_index else 0,
+            "unindexed_rows": vector_index["num_unindexed_rows"] if vector_index else health["num_rows"],
+        }
+        self._table_details[tbl.name] = (version, details)
+        return dict(details)
+
     def delete_project(self, project_id: str) -> bool:
         self.initialize()
         logger.info(f"Deleting all memories for project {project_id}")
         try:
-            self.tbl.delete(f"project_id = '{project_id}'")
+            # Index builds and compaction don't hold the write lock; let them finish before the
+            # table is dropped (index lock first, as they take it)
+            index_lock = self._index_lock(project_table_name(project_id)) \
+                if self.router.mode == "per_project" else nullcontext()
+            with index_lock, self.router.lock(project_id):
+                if self.router.mode == "per_project":
+                    # A project not yet moved out of the shared table still has rows there
+                    if self.router.is_pending(project_id):
+                        self.tbl.delete(f"project_id = {sql_str(project_id)}")
+                        self.router.pending.discard(project_id)
+                    # Its own table goes with a single drop instead of a row-by-row delete
+                    self.router.drop(project_id)
+                    self._fts_ready.discard(project_table_name(project_id))
+                    self._table_details.pop(project_table_name(project_id), None)
+                else:
+                    self.tbl.delete(f"project_id = {sql_str(project_id)}")
+                self.catalog.remove(project_id)
+            IngestManifest.remove(self.db_path, project_id)
             return True
         except Exception as e:
             logger.error(f"Error deleting project {project_id}: {e}")
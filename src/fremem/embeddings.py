@@ -0,0 +1,146 @@
+import abc
+import os
+import logging
+from typing import List, Union
+
+import numpy as np
+
+logger = logging.getLogger("fremem")
+
+# "torch" (sentence-transformers) or "onnx" (ONNX Runtime, no torch at runtime)
+EMBEDDING_BACKEND = os.environ.get("MCP_MEMORY_EMBEDDING_BACKEND", "torch").lower()
+# Local directory holding tokenizer.json and the exported ONNX model
+ONNX_MODEL_DIR = os.environ.get("MCP_MEMORY_ONNX_MODEL_DIR", "")
+# Model file inside ONNX_MODEL_DIR (an int8-quantized export by default)
+ONNX_MODEL_FILE = os.environ.get("MCP_MEMORY_ONNX_MODEL_FILE", "model_quantized.onnx")
+# ONNX Runtime intra-op threads (0 lets the runtime decide)
+ONNX_THREADS = int(os.environ.get("MCP_MEMORY_ONNX_THREADS", "0"))
+# Tokens per input; all-MiniLM-L6-v2 was trained with 256
+ONNX_MAX_LENGTH = int(os.environ.get("MCP_MEMORY_ONNX_MAX_LENGTH", "256"))
+
+
+def model_id(model_name: str, backend: str = None) -> str:
+    """
+    Identifier of the vectors a backend produces, used to key cached embeddings.
+
+    The torch backend keeps the bare model name so existing caches stay valid;
+    quantized exports produce slightly different vectors and get their own ID.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "torch":
+        return model_name
+    return f"{model_name}:{backend}:{ONNX_MODEL_FILE}"
+
+
+class EmbeddingBackend(abc.ABC):
+    """
+    Sentence embedding engine used by VectorStore.
+
+    `encode` follows SentenceTransformer.encode: a list of texts gives a 2-D
+    array, a single string a 1-D one, so existing callers work unchanged.
+    """
+    model_id: str
+    dimension: int
+
+    @abc.abstractmethod
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        ...
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+
+class TorchBackend(EmbeddingBackend):
+    """sentence-transformers on PyTorch."""
+    def __init__(self, model_name: str):
+        # Deferred so importing fremem doesn't pull in torch
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                'The torch embedding backend needs the torch extra (pip install "fremem[torch]"); '
+                "or set MCP_MEMORY_EMBEDDING_BACKEND=onnx"
+            ) from e
+        # Load embedding model (downloads on first run)
+        logger.info(f"Loading embedding model: {model_name}")
+        self.model = SentenceTransformer(model_name)
+        self.model_id = model_id(model_name, "torch")
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        return self.model.encode(sentences, batch_size=batch_size, normalize_embeddings=normalize_embeddings, **kwargs)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    ONNX Runtime on CPU, for an (int8-quantized) export of a sentence-transformers model.
+
+    Reproduces the model's mean pooling over token embeddings. Texts are
+    batched by length so padding stays small.
+    """
+    def __init__(self, model_name: str, model_dir: str = None, model_file: str = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = model_dir or ONNX_MODEL_DIR
+        if not model_dir:
+            raise ValueError("MCP_MEMORY_ONNX_MODEL_DIR must point to an ONNX export of the model")
+        model_file = model_file or ONNX_MODEL_FILE
+        path = os.path.join(model_dir, model_file)
+        if not os.path.exists(path):
+            # Hugging Face exports keep the model under onnx/
+            path = os.path.join(model_dir, "onnx", model_file)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=ONNX_MAX_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        logger.info(f"Loading ONNX embedding model: {path}")
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.model_id = model_id(model_name, "onnx")
+        self.dimension = int(self.encode(["dimension probe"]).shape[1])
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {"input_ids": input_ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        token_embeddings = self.session.run(None, feed)[0]
+        # Mean pooling over real (unpadded) tokens
+        weights = mask[..., None].astype(np.float32)
+        return (token_embeddings * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, getattr(self, "dimension", 0)), dtype=np.float32)
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            batch = self._encode_batch([texts[i] for i in idx])
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[idx] = batch
+        if normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors[0] if single else vectors
+
+
+def load_backend(model_name: str, backend: str = None) -> EmbeddingBackend:
+    """Create the configured embedding backend."""
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "torch":
+        return TorchBackend(model_name)
+    if backend == "onnx":
+        return OnnxBackend(model_name)
+    raise ValueError(f"Unknown embedding backend: {backend}")
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+logger = logging.getLogger("fremem")
+
+# Defaults (overridable via environment)
+MAX_CONCURRENT_READS = int(os.environ.get("MCP_MEMORY_MAX_CONCURRENT_READS", "4"))
+MAX_CONCURRENT_WRITES = int(os.environ.get("MCP_MEMORY_MAX_CONCURRENT_WRITES", "1"))
+MAX_QUEUE_DEPTH = int(os.environ.get("MCP_MEMORY_MAX_QUEUE_DEPTH", "256"))
+
+
+class StoreBusyError(RuntimeError):
+    """Raised when too many store operations are already queued."""
+
+
+class StoreExecutor:
+    """
+    Runs blocking VectorStore calls on a thread pool so the event loop stays free.
+
+    Reads and writes have separate concurrency limits, so a slow write never
+    occupies the slots searches need. Calls beyond `max_queue` pending
+    operations are rejected with StoreBusyError instead of piling up.
+    """
+    def __init__(self, max_reads: int = MAX_CONCURRENT_READS, max_writes: int = MAX_CONCURRENT_WRITES,
+                 max_queue: int = MAX_QUEUE_DEPTH):
+        self.max_reads = max(1, max_reads)
+        self.max_writes = max(1, max_writes)
+        self.max_queue = max(1, max_queue)
+        # One thread per slot: writes can never starve reads of a worker
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_reads + self.max_writes,
+            thread_name_prefix="fremem-store"
+        )
+        self._pending = 0
+        self._loop = None
+        self._read_sem = None
+        self._write_sem = None
+
+    def _semaphores(self):
+        # asyncio primitives are bound to a loop; recreate them if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._read_sem = asyncio.Semaphore(self.max_reads)
+            self._write_sem = asyncio.Semaphore(self.max_writes)
+        return self._read_sem, self._write_sem
+
+    @property
+    def pending(self) -> int:
+        """Number of operations waiting for or holding a slot."""
+        return self._pending
+
+    async def _run(self, sem: asyncio.Semaphore, fn: Callable, *args, **kwargs) -> Any:
+        if self._pending >= self.max_queue:
+            logger.warning(f"Rejecting {getattr(fn, '__name__', fn)}: {self._pending} store operations queued (limit {self.max_queue})")
+            raise StoreBusyError(f"Memory store is busy ({self._pending} operations queued), try again later")
+        self._pending += 1
+        try:
+            async with sem:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    async def run_read(self, fn: Callable, *args, **kwargs) -> Any:
+        read_sem, _ = self._semaphores()
+        return await self._run(read_sem, fn, *args, **kwargs)
+
+    async def run_write(self, fn: Callable, *args, **kwargs) -> Any:
+        _, write_sem = self._semaphores()
+        return await self._run(write_sem, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,48 @@
+import re
+from typing import Any, Dict, List, Sequence
+
+# Rank offset in reciprocal-rank fusion; 60 is the value from the original RRF paper
+RRF_K = 60
+
+# Tokens that look like code identifiers, ticket keys, paths or flags:
+# snake_case, dotted.names, Class::method, camelCase, PROJ-123, --flag, v2_config
+_IDENTIFIER_TOKEN = re.compile(
+    r"""^(
+        .*[_./:#@$\\].*                 # contains identifier punctuation
+      | -{1,2}[A-Za-z][\w-]*            # CLI flag
+      | [a-z]+[A-Z]\w*                  # camelCase
+      | [A-Z][a-z0-9]+[A-Z]\w*          # PascalCase with inner capital
+      | [A-Z]{2,}[a-z]\w*               # acronym prefix (HTTPServer)
+      | [A-Z][A-Z0-9]*-\d+              # ticket key
+      | (?=.*[A-Za-z])(?=.*\d)\w+       # letters mixed with digits
+    )$""",
+    re.VERBOSE,
+)
+
+
+def looks_like_identifier(query: str, max_tokens: int = 3) -> bool:
+    """True for short queries made only of identifier-like tokens (no model needed to match them)."""
+    tokens = query.split()
+    return 0 < len(tokens) <= max_tokens and all(_IDENTIFIER_TOKEN.match(t) for t in tokens)
+
+
+def rrf_fuse(ranked_lists: Sequence[List[Dict[str, Any]]], weights: Sequence[float], k: int,
+             key: str = "id", rrf_k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Weighted reciprocal-rank fusion of several best-first result lists.
+
+    Each document scores sum(weight / (rrf_k + rank)) over the lists it appears
+    in; the merged row keeps fields from every list (e.g. both `_distance` and
+    the keyword `_score`) and gains `_relevance_score`.
+    """
+    fused: Dict[Any, Dict[str, Any]] = {}
+    for results, weight in zip(ranked_lists, weights):
+        for rank, row in enumerate(results, start=1):
+            entry = fused.get(row[key])
+            if entry is None:
+                entry = fused[row[key]] = dict(row, _relevance_score=0.0)
+            else:
+                for field, value in row.items():
+                    entry.setdefault(field, value)
+            entry["_relevance_score"] += weight / (rrf_k + rank)
+    return sorted(fused.values(), key=lambda r: r["_relevance_score"], reverse=True)[:k]
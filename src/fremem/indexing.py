@@ -0,0 +1,154 @@
+import math
+import os
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("fremem")
+
+# Build an ANN index once a table holds this many rows (brute force is fine below)
+INDEX_MIN_ROWS = int(os.environ.get("MCP_MEMORY_INDEX_MIN_ROWS", "50000"))
+# Rebuild once unindexed rows exceed this fraction of indexed rows
+INDEX_REBUILD_RATIO = float(os.environ.get("MCP_MEMORY_INDEX_REBUILD_RATIO", "0.2"))
+# "IVF_PQ" or "IVF_HNSW_SQ"
+INDEX_TYPE = os.environ.get("MCP_MEMORY_INDEX_TYPE", "IVF_PQ").upper()
+# PQ needs enough rows to train its codebooks
+MIN_TRAINABLE_ROWS = 256
+# Fold appended rows into scalar indexes once this many are unindexed
+SCALAR_OPTIMIZE_ROWS = int(os.environ.get("MCP_MEMORY_SCALAR_OPTIMIZE_ROWS", "10000"))
+
+# Columns every VectorStore filter/delete/upsert uses. BITMAP suits the few
+# distinct project IDs and doc types; BTREE suits high-cardinality sources, IDs
+# and row keys; LABEL_LIST serves array_has_all() tag filters.
+SCALAR_INDEXES = {
+    "project_id": "BITMAP",
+    "source": "BTREE",
+    "id": "BTREE",
+    "row_key": "BTREE",
+    "doc_type": "BITMAP",
+    "tags": "LABEL_LIST",
+}
+
+
+def _find_index(tbl, column: str):
+    """Return the index config covering `column`, if any."""
+    try:
+        for idx in tbl.list_indices():
+            if column in list(getattr(idx, "columns", [])):
+                return idx
+    except Exception as e:
+        logger.debug(f"Could not list indices: {e}")
+    return None
+
+
+def index_stats(tbl, column: str) -> Optional[Dict[str, Any]]:
+    """Indexed / unindexed row counts for the index on `column` (None if not indexed)."""
+    idx = _find_index(tbl, column)
+    if idx is None:
+        return None
+    stats = tbl.index_stats(idx.name)
+    return {
+        "name": idx.name,
+        "index_type": str(getattr(idx, "index_type", "")),
+        "num_indexed_rows": getattr(stats, "num_indexed_rows", 0) or 0,
+        "num_unindexed_rows": getattr(stats, "num_unindexed_rows", 0) or 0,
+        "distance_type": getattr(stats, "distance_type", None),
+    }
+
+
+def _build_vector_index(tbl, num_rows: int, dim: int, metric: str):
+    num_partitions = max(1, min(int(math.sqrt(num_rows)), num_rows // MIN_TRAINABLE_ROWS))
+    kwargs = {
+        "metric": metric,
+        "vector_column_name": "vector",
+        "num_partitions": num_partitions,
+        "index_type": INDEX_TYPE,
+        "replace": True,
+    }
+    if INDEX_TYPE == "IVF_PQ":
+        # 16 dimensions per sub-vector keeps PQ distance computation SIMD friendly
+        kwargs["num_sub_vectors"] = max(1, dim // 16)
+    logger.info(f"Building {INDEX_TYPE} index over {num_rows} rows ({num_partitions} partitions)")
+    tbl.create_index(**kwargs)
+
+
+def ensure_vector_index(tbl, dim: int, metric: str, force: bool = False) -> str:
+    """
+    Create or rebuild the ANN index on the vector column when it is worth it.
+
+    Creates the index once the table passes INDEX_MIN_ROWS and rebuilds it once
+    the unindexed tail exceeds INDEX_REBUILD_RATIO of the indexed rows. `force`
+    (re)builds regardless of thresholds. Returns the action taken.
+    """
+    num_rows = tbl.count_rows()
+    if num_rows < MIN_TRAINABLE_ROWS:
+        return "skipped (too few rows)"
+
+    stats = index_stats(tbl, "vector")
+    if stats is None:
+        if force or num_rows >= INDEX_MIN_ROWS:
+            _build_vector_index(tbl, num_rows, dim, metric)
+            return "created"
+        return "skipped (below threshold)"
+
+    if stats["distance_type"] and stats["distance_type"].lower() != metric.lower():
+        # An index trained for another metric can't serve these queries
+        _build_vector_index(tbl, num_rows, dim, metric)
+        return "rebuilt (metric changed)"
+
+    indexed = stats["num_indexed_rows"]
+    unindexed = stats["num_unindexed_rows"]
+    if force or unindexed > max(indexed * INDEX_REBUILD_RATIO, MIN_TRAINABLE_ROWS):
+        _build_vector_index(tbl, num_rows, dim, metric)
+        return "rebuilt"
+    return "up to date"
+
+
+def ensure_scalar_indexes(tbl, columns: Dict[str, str] = None, force: bool = False) -> Dict[str, str]:
+    """
+    Create missing scalar indexes (column -> index type) and fold unindexed rows into them.
+
+    Scalar indexes let prefiltered vector search and deletes touch only matching
+    rows instead of scanning the whole table. Returns the action per column.
+    """
+    columns = columns or SCALAR_INDEXES
+    if tbl.count_rows() == 0:
+        return {column: "skipped (empty table)" for column in columns}
+
+    actions = {}
+    needs_optimize = False
+    for column, index_type in columns.items():
+        stats = index_stats(tbl, column)
+        if stats is None or force:
+            logger.info(f"Building {index_type} scalar index on '{column}'")
+            tbl.create_scalar_index(column, index_type=index_type, replace=True)
+            actions[column] = "created" if stats is None else "rebuilt"
+        elif stats["num_unindexed_rows"] >= SCALAR_OPTIMIZE_ROWS:
+            needs_optimize = True
+            actions[column] = "updated"
+        else:
+            actions[column] = "up to date"
+
+    if needs_optimize:
+        # Incrementally merges new rows into existing indexes (no retraining)
+        tbl.to_lance().optimize.optimize_indices()
+    return actions
+
+
+def ensure_fts_index(tbl, column: str = "text", force: bool = False) -> str:
+    """
+    Create the full-text (BM25) index used by keyword and hybrid search.
+
+    Appended rows are merged into it by optimize_indices together with the scalar
+    indexes; until then LanceDB still searches them without the index.
+    """
+    if tbl.count_rows() == 0:
+        return "skipped (empty table)"
+    stats = index_stats(tbl, column)
+    if stats is None or force:
+        logger.info(f"Building full-text index on '{column}'")
+        tbl.create_fts_index(column, use_tantivy=False, replace=True)
+        return "created" if stats is None else "rebuilt"
+    if stats["num_unindexed_rows"] >= SCALAR_OPTIMIZE_ROWS:
+        tbl.to_lance().optimize.optimize_indices()
+        return "updated"
+    return "up to date"
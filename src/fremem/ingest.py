@@ -1,26 +1,112 @@
 import argparse
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Tuple
 from fremem.db import store
 from fremem.chunking import RecursiveCharacterChunker, SemanticChunker
+from fremem.manifest import IngestManifest
+from fremem.pipeline import IngestPipeline, iter_windows
 
 from pypdf import PdfReader
 
-def read_file(path):
+# Processes used to extract text from large PDFs (1 = extract in-process)
+PDF_WORKERS = int(os.environ.get("MCP_MEMORY_PDF_WORKERS", "1"))
+# Pages handed to each extraction task
+PDF_PAGES_PER_TASK = 16
+# Chunks diffed/embedded/written together when ingesting a single file
+INGEST_WINDOW = 512
+
+def _extract_pages(path: str, start: int, stop: int):
+    """Extract text of pages [start, stop) -- runs in a worker process."""
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def iter_pdf_pages(path: str, workers: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) for each page of a PDF, in order.
+
+    With workers > 1, page ranges are extracted in parallel processes while a
+    bounded window of results is kept, so memory does not grow with page count.
+    """
+    workers = PDF_WORKERS if workers is None else workers
+    reader = PdfReader(path)
+    num_pages = len(reader.pages)
+
+    if workers <= 1 or num_pages <= PDF_PAGES_PER_TASK:
+        for i, page in enumerate(reader.pages):
+            yield i + 1, page.extract_text() or ""
+        return
+
+    ranges = [(start, min(start + PDF_PAGES_PER_TASK, num_pages)) for start in range(0, num_pages, PDF_PAGES_PER_TASK)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = iter(ranges)
+        window = [pool.submit(_extract_pages, path, start, stop) for start, stop in islice(pending, workers * 2)]
+        page_no = 1
+        while window:
+            texts = window.pop(0).result()
+            for start, stop in islice(pending, 1):
+                window.append(pool.submit(_extract_pages, path, start, stop))
+            for text in texts:
+                yield page_no, text
+                page_no += 1
+
+def iter_sections(path: str, pdf_workers: Optional[int] = None) -> Iterator[Tuple[Optional[int], str]]:
+    """Yield (page_number, text) sections of a file; text files are one section with no page."""
     if path.lower().endswith('.pdf'):
         try:
-            reader = PdfReader(path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            yield from iter_pdf_pages(path, pdf_workers)
         except Exception as e:
             print(f"Error reading PDF {path}: {e}")
             raise e
     else:
         # Default to text/markdown
         with open(path, 'r', encoding='utf-8') as f:
-            return f.read()
+            yield None, f.read()
+
+def read_file(path):
+    return "\n".join(text for _, text in iter_sections(path)) + ("\n" if path.lower().endswith('.pdf') else "")
+
+def read_sections(path: str, stream: bool = False):
+    """
+    Materialized iter_sections() (picklable result for worker processes), or
+    the lazy iterator itself with stream=True.
+    """
+    sections = iter_sections(path)
+    return sections if stream else list(sections)
+
+def iter_records(file_path: str, sections: Iterable[Tuple[Optional[int], str]], chunker=None) -> Iterator[dict]:
+    """Chunk sections one at a time into records; PDF chunks carry their page number."""
+    if chunker is None:
+        chunker = RecursiveCharacterChunker(chunk_size=1000, chunk_overlap=200)
+        
+    base_name = os.path.basename(file_path)
+    i = 0
+    for page, text in sections:
+        for chunk in chunker.chunk(text):
+            meta = {"source": file_path, "chunk_index": i}
+            if page is not None:
+                meta["page"] = page
+            yield {
+                "id": f"{base_name}#{i}",
+                "text": chunk,
+                "meta": meta
+            }
+            i += 1
+
+def build_records(file_path: str, chunker=None, pdf_workers: Optional[int] = None, stream: bool = False):
+    """
+    Read and chunk a file into records ready for store.add_many(). With
+    stream=True, records are produced lazily as pages are read.
+    """
+    records = iter_records(file_path, iter_sections(file_path, pdf_workers), chunker)
+    return records if stream else list(records)
+
+def chunk_records(file_path: str, sections, chunker=None):
+    """Chunk already-read sections (see read_sections) into records."""
+    return list(iter_records(file_path, sections, chunker))
 
 def ingest_file(project_id: str, file_path: str, chunker=None, replace: bool = True):
     """Ingest a single file into the memory store."""
@@ -30,32 +116,30 @@ def ingest_file(project_id: str, file_path: str, chunker=None, replace: bool = T
 
     print(f"Ingesting {file_path}...")
     try:
-        if replace:
-            store.delete_source(project_id, file_path)
-
-        content = read_file(file_path)
-        
-        if chunker is None:
-            chunker = RecursiveCharacterChunker(chunk_size=1000, chunk_overlap=200)
-            
-        chunks = chunker.chunk(content)
-        
-        base_name = os.path.basename(file_path)
-        
         # Ensure store is initialized before adding
         store.initialize()
 
-        count = 0
-        for i, chunk in enumerate(chunks):
-            doc_id = f"{base_name}#{i}"
-            store.add(
-                project_id, 
-                doc_id, 
-                chunk, 
-                {"source": file_path, "chunk_index": i}
-            )
-            count += 1
-        print(f"  Added {count} chunks.")
+        # Existing chunk hashes for this source, so only changed chunks are embedded
+        index = store.source_index(project_id, file_path) if replace else {}
+        seen = set()
+        written = unchanged = 0
+
+        # Pages are chunked and written as they stream in
+        records = iter_records(file_path, iter_sections(file_path), chunker)
+        for window in iter_windows(records, INGEST_WINDOW):
+            seen.update(rec["id"] for rec in window)
+            to_write = store.diff_records(project_id, index, window) if replace else window
+            unchanged += len(window) - len(to_write)
+            written += store.add_many(project_id, to_write)
+
+        # Delete after writing so the source never disappears mid-update
+        stale_ids = [doc_id for doc_id in index if doc_id not in seen]
+        store.delete_ids(project_id, stale_ids)
+
+        if replace:
+            print(f"  Wrote {written} chunks, removed {len(stale_ids)}, {unchanged} unchanged.")
+        else:
+            print(f"  Added {written} chunks.")
         
     except Exception as e:
         print(f"  Error ingesting {file_path}: {e}")
@@ -66,6 +150,11 @@ def main():
     parser = argparse.ArgumentParser(description="Ingest markdown files into MCP memory")
     parser.add_argument("--project", required=True, help="Project ID")
     parser.add_argument("--semantic", action="store_true", help="Use semantic chunking (slower but better context)")
+    parser.add_argument("--flush-size", type=int, default=2048, help="Number of chunks to buffer before each bulk write")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to read and chunk files in parallel")
+    parser.add_argument("--pdf-workers", type=int, default=PDF_WORKERS, help="Processes used to extract pages of each PDF")
+    parser.add_argument("--full", action="store_true", help="Re-ingest every file even if unchanged since the last run")
+    parser.add_argument("--keep-missing", action="store_true", help="Keep memories of previously ingested files that no longer exist")
     parser.add_argument("files", nargs="+", help="Files to ingest")
     
     args = parser.parse_args()
@@ -78,12 +167,60 @@ def main():
         print("Using Semantic Chunking...")
         chunker = SemanticChunker()
         
+    manifest = IngestManifest.load(store.db_path, args.project)
+
+    # Files recorded last time that are gone from disk
+    if not args.keep_missing:
+        for source in manifest.missing_sources():
+            print(f"Removing {source}: File no longer exists")
+            store.delete_source(args.project, source)
+            manifest.forget(source)
+
+    # Decide which files need work before starting the pipeline
+    fingerprints = {}
+    skipped = 0
     for file_path in args.files:
+        if not os.path.exists(file_path):
+            print(f"Skipping {file_path}: File not found")
+            continue
         try:
-            ingest_file(args.project, file_path, chunker=chunker)
-        except Exception:
-            # Continue to next file on error
+            fingerprint = manifest.fingerprint(file_path)
+        except OSError as e:
+            print(f"  Error ingesting {file_path}: {e}")
             continue
+        if not args.full and manifest.is_unchanged(file_path, fingerprint):
+            # Keep the fresh mtime so the next run can skip hashing
+            manifest.record(file_path, fingerprint, manifest.entries[file_path]["chunk_ids"])
+            skipped += 1
+            continue
+        fingerprints[file_path] = fingerprint
+
+    def on_file_done(file_path, chunk_ids):
+        manifest.record(file_path, fingerprints[file_path], chunk_ids)
+        store.record_source(args.project, file_path, fingerprints[file_path]["sha256"])
+
+    # One worker reads in-process, so each file streams through the pipeline;
+    # worker processes have to send a file's records back in one piece
+    stream = args.workers <= 1
+    if chunker is None:
+        # Reading and chunking both happen in the worker processes
+        # Avoid nesting page-level pools inside file-level worker processes
+        prepare = partial(build_records, pdf_workers=args.pdf_workers if stream else 1, stream=stream)
+        pipeline = IngestPipeline(store, args.project, prepare, workers=args.workers,
+                                  flush_size=args.flush_size, on_file_done=on_file_done)
+    else:
+        # Semantic chunking needs the embedding model, so only reading is offloaded
+        pipeline = IngestPipeline(store, args.project, partial(read_sections, stream=stream), workers=args.workers,
+                                  flush_size=args.flush_size, on_file_done=on_file_done,
+                                  chunk=lambda path, sections: iter_records(path, sections, chunker))
+    try:
+        written = pipeline.run(list(fingerprints))
+    finally:
+        manifest.save()
+
+    print(f"Wrote {written} chunks from {len(fingerprints) - len(pipeline.errors)} files.")
+    if skipped:
+        print(f"Skipped {skipped} unchanged files.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,100 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Lock files live here, under MCP_MEMORY_PATH
+LOCKS_DIR = "locks"
+
+
+def _lock_file(f, blocking: bool) -> bool:
+    if fcntl is not None:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except BlockingIOError:
+            return False
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            threading.Event().wait(0.05)
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Exclusive lock shared by the threads of this process and by other processes.
+
+    Other processes are excluded with an OS lock on `path` (released by the OS
+    if the holder dies). It is reentrant within a thread, so a write that calls
+    another write does not deadlock. Same acquire/release/with API as
+    threading.Lock.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._owner = None
+        self._file = None
+
+    def held(self) -> bool:
+        """True if the calling thread holds the lock."""
+        return self._owner == threading.get_ident()
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        if self._depth == 0:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                f = open(self.path, "a+")
+                if not _lock_file(f, blocking):
+                    f.close()
+                    self._lock.release()
+                    return False
+            except BaseException:
+                self._lock.release()
+                raise
+            self._file = f
+            self._owner = threading.get_ident()
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+            try:
+                _unlock_file(self._file)
+            finally:
+                self._file.close()
+                self._file = None
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def store_lock(db_path: str, name: str) -> FileLock:
+    """The named lock of the store at `db_path`."""
+    return FileLock(os.path.join(db_path, LOCKS_DIR, f"{name}.lock"))
@@ -11,6 +11,22 @@ def main():
     delete_parser.add_argument("project_id", help="ID of the project to delete")
     delete_parser.add_argument("--force", "-f", action="store_true", help="Skip confirmation")
 
+    # Reindex command
+    reindex_parser = subparsers.add_parser("reindex", help="Force a rebuild of the vector (ANN) index")
+    reindex_parser.add_argument("--project", help="Only rebuild this project's table (per-project storage)")
+
+    # Optimize command
+    optimize_parser = subparsers.add_parser("optimize", help="Compact fragments, prune old versions and refresh indexes")
+    optimize_parser.add_argument("--project", help="Only optimize this project's table (per-project storage)")
+    optimize_parser.add_argument("--force", "-f", action="store_true", help="Compact even if below the thresholds")
+
+    # Rebuild the source catalog
+    subparsers.add_parser("rebuild-catalog", help="Recreate the source catalog from the stored memories")
+
+    # Move projects out of the shared table
+    subparsers.add_parser("migrate-projects",
+                          help="Move projects from memory_store into their own tables (MCP_MEMORY_STORAGE_MODE=per_project)")
+
     args = parser.parse_args()
 
     if args.command == "delete":
@@ -27,5 +43,40 @@ def main():
             print("❌ Error deleting project.")
             sys.exit(1)
 
+    elif args.command == "reindex":
+        print("Rebuilding indexes...")
+        results = store.ensure_indexes(force=True, project_id=args.project)
+        for column, action in results.items():
+            print(f"  {column}: {action}")
+        if any(action.startswith("error") for action in results.values()):
+            sys.exit(1)
+
+    elif args.command == "optimize":
+        print("Optimizing tables...")
+        results = store.optimize(force=args.force, project_id=args.project)
+        for step, action in results.items():
+            print(f"  {step}: {action}")
+        if any(action.startswith("error") for action in results.values()):
+            sys.exit(1)
+
+    elif args.command == "rebuild-catalog":
+        print("Rebuilding source catalog...")
+        store.rebuild_catalog()
+        print("✅ Source catalog rebuilt.")
+
+    elif args.command == "migrate-projects":
+        store.initialize()
+        if store.router.mode != "per_project":
+            print("❌ Set MCP_MEMORY_STORAGE_MODE=per_project first.")
+            sys.exit(1)
+        pending = len(store.router.pending)
+        print(f"Moving {pending} projects to their own tables...")
+        moved = store.router.migrate()
+        store.ensure_indexes()
+        if store.router.pending:
+            print(f"❌ {len(store.router.pending)} projects could not be moved (see log).")
+            sys.exit(1)
+        print(f"✅ Moved {moved} memories.")
+
 if __name__ == "__main__":
     main()
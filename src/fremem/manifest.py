@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from fremem.util import safe_name
+
+MANIFEST_DIR = "manifests"
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _manifest_path(db_path: str, project_id: str) -> str:
+    return os.path.join(db_path, MANIFEST_DIR, f"{safe_name(project_id)}.json")
+
+
+class IngestManifest:
+    """
+    Per-project record of ingested files: size, mtime, content hash and chunk IDs.
+
+    Lets `fremem-ingest` skip files that have not changed since the last run.
+    Sources are keyed by the path as given (it is also the stored `source`);
+    each entry keeps the absolute path too, so relative sources are checked
+    against the directory they were ingested from. Stored as JSON under
+    MCP_MEMORY_PATH/manifests/.
+    """
+    def __init__(self, path: str, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = path
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, db_path: str, project_id: str) -> "IngestManifest":
+        path = _manifest_path(db_path, project_id)
+        entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries = json.load(f).get("sources", {})
+            except (OSError, ValueError):
+                # A corrupt manifest only costs a full re-ingest
+                entries = {}
+        return cls(path, entries)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"sources": self.entries}, f)
+        os.replace(tmp, self.path)
+
+    def fingerprint(self, source: str) -> Dict[str, Any]:
+        """Size, mtime and sha256 of a file. Reuses the stored hash if size and mtime are unchanged."""
+        st = os.stat(source)
+        entry = self.entries.get(source)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime:
+            sha = entry["sha256"]
+        else:
+            sha = file_sha256(source)
+        return {"size": st.st_size, "mtime": st.st_mtime, "sha256": sha}
+
+    def is_unchanged(self, source: str, fingerprint: Dict[str, Any]) -> bool:
+        entry = self.entries.get(source)
+        return entry is not None and entry["sha256"] == fingerprint["sha256"]
+
+    def record(self, source: str, fingerprint: Dict[str, Any], chunk_ids: List[str]):
+        self.entries[source] = dict(fingerprint, path=os.path.abspath(source), chunk_ids=list(chunk_ids))
+
+    def forget(self, source: str):
+        self.entries.pop(source, None)
+
+    def missing_sources(self) -> List[str]:
+        """
+        Sources recorded in the manifest that no longer exist on disk.
+
+        Relative sources recorded before absolute paths were kept cannot be
+        located reliably, so they are never reported.
+        """
+        missing = []
+        for source, entry in self.entries.items():
+            path = entry.get("path") or (source if os.path.isabs(source) else None)
+            if path is not None and not os.path.exists(path):
+                missing.append(source)
+        return sorted(missing)
+
+    @classmethod
+    def remove(cls, db_path: str, project_id: str, source: Optional[str] = None):
+        """Drop one source (or the whole project) so the next ingest re-processes it."""
+        path = _manifest_path(db_path, project_id)
+        if not os.path.exists(path):
+            return
+        if source is None:
+            os.remove(path)
+            return
+        manifest = cls.load(db_path, project_id)
+        if source in manifest.entries:
+            manifest.forget(source)
+            manifest.save()
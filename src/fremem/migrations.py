@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+
+from fremem.schema import SCHEMA_VERSION, promoted_columns, row_key, table_schema
+from fremem.util import table_names
+
+logger = logging.getLogger("fremem")
+
+MIGRATIONS_DIR = "migrations"
+# Rows read, transformed and written per step; bounds migration memory use
+MIGRATE_BATCH_ROWS = int(os.environ.get("MCP_MEMORY_MIGRATE_BATCH_ROWS", "8192"))
+
+
+def _meta(row: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return json.loads(row.get("metadata_json") or "{}")
+    except ValueError:
+        return {}
+
+
+def _add_source(row: Dict[str, Any]) -> Dict[str, Any]:
+    source = _meta(row).get("source", "")
+    row["source"] = source if isinstance(source, str) else ""
+    return row
+
+
+def _promote_metadata(row: Dict[str, Any]) -> Dict[str, Any]:
+    row.update(promoted_columns(_meta(row)))
+    return row
+
+
+def _add_row_key(row: Dict[str, Any]) -> Dict[str, Any]:
+    row["row_key"] = row_key(row.get("project_id") or "", row.get("id") or "")
+    return row
+
+
+# (version, description, row transform from the previous version). A table at
+# version N is upgraded by applying every transform above N in order.
+MIGRATIONS: List[Tuple[int, str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = [
+    (2, "add source column", _add_source),
+    (3, "promote metadata keys to typed columns", _promote_metadata),
+    (4, "add row_key upsert column", _add_row_key),
+]
+
+
+def schema_version(schema: pa.Schema) -> int:
+    """Version of a memory table schema: from its metadata, else inferred from its columns."""
+    version = (schema.metadata or {}).get(b"fremem.schema_version")
+    if version:
+        return int(version)
+    names = set(schema.names)
+    if "row_key" in names:
+        return 4
+    if set(table_schema(1).names) - {"row_key"} <= names:
+        return 3
+    if "source" in names:
+        return 2
+    return 1
+
+
+def _progress_path(db_path: str, name: str) -> str:
+    return os.path.join(db_path, MIGRATIONS_DIR, f"{name}.json")
+
+
+def _load_progress(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_progress(path: str, progress: Dict[str, Any]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+    os.replace(tmp, path)
+
+
+def _transform(batch: pa.RecordBatch, from_version: int, target: pa.Schema) -> pa.Table:
+    steps = [fn for version, _, fn in MIGRATIONS if version > from_version]
+    rows = []
+    for row in batch.to_pylist():
+        # Placeholder row written by very old releases to create the table
+        if row.get("id") == "init_schema":
+            continue
+        for step in steps:
+            row = step(row)
+        rows.append(row)
+    return pa.Table.from_pylist(rows, schema=target)
+
+
+def migrate_table(db, db_path: str, name: str, batch_rows: int = None) -> bool:
+    """
+    Upgrade a memory table to SCHEMA_VERSION if it is older. Returns True if it was migrated.
+
+    The source table is read at a pinned version, fragment by fragment, in
+    batches of `batch_rows`; each batch is transformed and appended to a staging
+    table, so memory use is bounded by the batch size. Progress (finished
+    fragments and the staging version after each) is saved under
+    MCP_MEMORY_PATH/migrations/, so an interrupted run resumes where it stopped
+    instead of starting over. When staging is complete it replaces the table's
+    contents in one overwrite commit: readers see either the old or the new
+    table, never a mix.
+    """
+    batch_rows = batch_rows or MIGRATE_BATCH_ROWS
+    progress_path = _progress_path(db_path, name)
+    staging_name = f"migrating_v{SCHEMA_VERSION}__{name}"
+
+    tbl = db.open_table(name)
+    from_version = schema_version(tbl.schema)
+    if from_version >= SCHEMA_VERSION:
+        # Clean up after a run interrupted between the swap and its cleanup
+        if os.path.exists(progress_path):
+            if staging_name in table_names(db):
+                db.drop_table(staging_name)
+            os.remove(progress_path)
+        return False
+
+    dim = tbl.schema.field("vector").type.list_size
+    target = table_schema(dim)
+    source = tbl.to_lance()
+
+    progress = _load_progress(progress_path)
+    staging = None
+    if progress and progress.get("target") == SCHEMA_VERSION and staging_name in table_names(db):
+        try:
+            source = source.checkout_version(progress["source_version"])
+            staging = db.open_table(staging_name)
+            # Drop batches committed after the last finished fragment
+            staging.restore(progress["staging_version"])
+            logger.info(f"Resuming migration of '{name}' ({len(progress['done_fragments'])} fragments done)")
+        except Exception as e:
+            logger.warning(f"Cannot resume migration of '{name}', starting over: {e}")
+            source = tbl.to_lance()
+            staging = None
+    if staging is None:
+        if staging_name in table_names(db):
+            db.drop_table(staging_name)
+        staging = db.create_table(staging_name, schema=target)
+        progress = {
+            "target": SCHEMA_VERSION,
+            "source_version": source.version,
+            "staging_version": staging.version,
+            "done_fragments": [],
+        }
+        _save_progress(progress_path, progress)
+
+    logger.info(f"Migrating '{name}' from schema v{from_version} to v{SCHEMA_VERSION} "
+                f"({source.count_rows()} rows, {batch_rows} per batch)")
+    done = set(progress["done_fragments"])
+    for fragment in source.get_fragments():
+        if fragment.fragment_id in done:
+            continue
+        for batch in fragment.to_batches(batch_size=batch_rows):
+            rows = _transform(batch, from_version, target)
+            if rows.num_rows:
+                staging.add(rows)
+        progress["done_fragments"].append(fragment.fragment_id)
+        progress["staging_version"] = staging.version
+        _save_progress(progress_path, progress)
+
+    # Swap: one overwrite commit streamed from the staging table
+    reader = pa.RecordBatchReader.from_batches(
+        staging.schema, staging.to_lance().to_batches(batch_size=batch_rows)
+    )
+    db.create_table(name, data=reader, schema=staging.schema, mode="overwrite")
+    db.drop_table(staging_name)
+    os.remove(progress_path)
+    logger.info(f"Migration of '{name}' to schema v{SCHEMA_VERSION} complete.")
+    return True
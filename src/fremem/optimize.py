@@ -0,0 +1,133 @@
+import os
+import logging
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("fremem")
+
+# Compact once a table has this many fragments (each small write adds one)
+COMPACT_MIN_FRAGMENTS = int(os.environ.get("MCP_MEMORY_COMPACT_MIN_FRAGMENTS", "64"))
+# ...or once this fraction of its rows are deleted but still stored
+COMPACT_DELETED_RATIO = float(os.environ.get("MCP_MEMORY_COMPACT_DELETED_RATIO", "0.1"))
+# Table versions older than this are pruned after compaction
+VERSION_RETENTION_HOURS = float(os.environ.get("MCP_MEMORY_VERSION_RETENTION_HOURS", "1"))
+# Check table health after this many write commits to a table
+OPTIMIZE_CHECK_WRITES = int(os.environ.get("MCP_MEMORY_OPTIMIZE_CHECK_WRITES", "100"))
+
+
+def table_health(tbl) -> Dict[str, Any]:
+    """Fragment and deleted-row counts of a table's current version."""
+    ds = tbl.to_lance()
+    try:
+        stats = ds.stats.dataset_stats()
+        num_fragments = stats["num_fragments"]
+        num_deleted = stats["num_deleted_rows"]
+        num_small = stats.get("num_small_files", 0)
+    except Exception:
+        fragments = ds.get_fragments()
+        num_fragments = len(fragments)
+        num_deleted = sum(f.count_deletions() for f in fragments)
+        num_small = 0
+    num_rows = ds.count_rows()
+    stored = num_rows + num_deleted
+    return {
+        "num_rows": num_rows,
+        "num_fragments": num_fragments,
+        "num_small_files": num_small,
+        "num_deleted_rows": num_deleted,
+        "deleted_ratio": (num_deleted / stored) if stored else 0.0,
+    }
+
+
+def disk_usage(tbl) -> int:
+    """Bytes the table occupies on disk, including versions not yet pruned."""
+    root = tbl.to_lance().uri
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                # Removed by a concurrent cleanup
+                pass
+    return total
+
+
+def compaction_reason(health: Dict[str, Any]) -> Optional[str]:
+    """Why a table with this health needs compacting, or None if it doesn't."""
+    if health["num_fragments"] >= COMPACT_MIN_FRAGMENTS:
+        return f"{health['num_fragments']} fragments"
+    if health["num_deleted_rows"] and health["deleted_ratio"] >= COMPACT_DELETED_RATIO:
+        return f"{health['deleted_ratio']:.0%} deleted rows"
+    return None
+
+
+def _is_commit_conflict(error: Exception) -> bool:
+    return "commit conflict" in str(error).lower()
+
+
+def compact(tbl, commit_lock=None):
+    """
+    Rewrite small fragments and materialize deletions.
+
+    The rewrite runs without `commit_lock` (the store's write lock) so writes
+    keep flowing; only its commit is taken under it. If a write touched the
+    same fragments meanwhile the commit conflicts, and the (short) rewrite is
+    redone with writes held off.
+    """
+    from lance.optimize import Compaction
+
+    tbl.checkout_latest()
+    ds = tbl.to_lance()
+    plan = Compaction.plan(ds, {})
+    if not plan.tasks:
+        return
+    rewrites = [task.execute(ds) for task in plan.tasks]
+    lock = commit_lock or nullcontext()
+    try:
+        with lock:
+            Compaction.commit(ds, rewrites)
+        return
+    except Exception as e:
+        if not _is_commit_conflict(e):
+            raise
+    logger.info(f"Compaction of '{tbl.name}' raced a write; retrying under the write lock")
+    with lock:
+        tbl.checkout_latest()
+        ds = tbl.to_lance()
+        plan = Compaction.plan(ds, {})
+        Compaction.commit(ds, [task.execute(ds) for task in plan.tasks])
+
+
+def optimize_table(tbl, force: bool = False, retention_hours: float = None, commit_lock=None) -> Dict[str, str]:
+    """
+    Compact small fragments, materialize deletions and prune old versions.
+
+    Compaction commits a new version, so readers keep using the version they
+    started on and are never blocked; writers only wait for its commit (see
+    compact()). Versions older than `retention_hours` (and the files only
+    they reference) are removed. Existing indexes are remapped to the new
+    fragments and unindexed rows merged into them. Returns the action taken
+    per step.
+    """
+    health = table_health(tbl)
+    reason = "forced" if force else compaction_reason(health)
+    if reason is None:
+        return {"compact": "skipped (healthy)"}
+
+    retention = VERSION_RETENTION_HOURS if retention_hours is None else retention_hours
+    logger.info(f"Optimizing table '{tbl.name}' ({reason})")
+    compact(tbl, commit_lock)
+    # compact() committed through lance directly, past this handle's version
+    tbl.checkout_latest()
+    ds = tbl.to_lance()
+    # Index merges commit alongside concurrent writes, so they need no lock
+    ds.optimize.optimize_indices()
+    ds.cleanup_old_versions(older_than=timedelta(hours=retention))
+    tbl.checkout_latest()
+    after = table_health(tbl)
+    return {
+        "compact": f"{health['num_fragments']} -> {after['num_fragments']} fragments ({reason})",
+        "cleanup": f"pruned versions older than {retention:g}h",
+    }
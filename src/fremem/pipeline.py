@@ -0,0 +1,173 @@
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Sentinel that tells a stage its upstream is finished
+_DONE = object()
+
+
+def iter_windows(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    """Consecutive lists of up to `size` records."""
+    records = iter(records)
+    while True:
+        window = list(islice(records, size))
+        if not window:
+            return
+        yield window
+
+
+class _InlineExecutor:
+    """Runs submitted calls immediately; used when only one worker is requested."""
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class IngestPipeline:
+    """
+    Overlapped multi-file ingest: read/chunk -> embed -> write.
+
+    Files are read and chunked on a process pool (`workers` processes), chunk
+    records are grouped into large batches for a single embedding thread, and a
+    single writer thread commits each batch to LanceDB. Stages are connected by
+    bounded queues so a slow stage applies back-pressure instead of buffering
+    the whole corpus in memory.
+
+    `prepare(path)` must be a picklable top-level function returning either
+    records, or raw sections when `chunk(path, sections)` is given to finish
+    chunking in the parent (e.g. semantic chunking, which needs the model).
+    Records are diffed and queued in windows of `flush_size`, so with a single
+    worker `prepare` can return a generator and a file never has to fit in
+    memory; results from worker processes are pickled whole.
+    """
+    def __init__(self, store, project_id: str, prepare: Callable, workers: int = 1,
+                 flush_size: int = 2048, chunk: Optional[Callable] = None,
+                 on_file_done: Optional[Callable] = None):
+        self.store = store
+        self.project_id = project_id
+        self.prepare = prepare
+        self.workers = max(1, workers)
+        self.flush_size = flush_size
+        self.chunk = chunk
+        self.on_file_done = on_file_done
+        self.embed_queue = queue.Queue(maxsize=self.workers * 2)
+        self.write_queue = queue.Queue(maxsize=2)
+        self.errors: Dict[str, str] = {}
+        self.written = 0
+
+    def run(self, files: List[str]) -> int:
+        """Ingest `files`; returns the number of chunks written. Per-file errors are collected in `errors`."""
+        embedder = threading.Thread(target=self._embed_stage, name="fremem-embed", daemon=True)
+        writer = threading.Thread(target=self._write_stage, name="fremem-write", daemon=True)
+        embedder.start()
+        writer.start()
+        try:
+            pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else _InlineExecutor()
+            with pool:
+                # Keep a bounded window of files in flight so results don't pile up
+                paths = iter(files)
+                in_flight = {}
+                while True:
+                    for path in paths:
+                        in_flight[pool.submit(self.prepare, path)] = path
+                        if len(in_flight) >= self.workers * 2:
+                            break
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._diff(in_flight.pop(future), future)
+        finally:
+            self.embed_queue.put(_DONE)
+            embedder.join()
+            writer.join()
+        return self.written
+
+    def _diff(self, path: str, future: Future):
+        chunk_ids: List[str] = []
+        changed = 0
+        try:
+            prepared = future.result()
+            records = self.chunk(path, prepared) if self.chunk else prepared
+            index = self.store.source_index(self.project_id, path)
+            for window in iter_windows(records, self.flush_size):
+                chunk_ids.extend(rec["id"] for rec in window)
+                to_write = self.store.diff_records(self.project_id, index, window)
+                changed += len(to_write)
+                if to_write:
+                    self.embed_queue.put((path, to_write, None))
+        except Exception as e:
+            print(f"  Error ingesting {path}: {e}")
+            self.errors[path] = str(e)
+            return
+        wanted = set(chunk_ids)
+        stale_ids = [doc_id for doc_id in index if doc_id not in wanted]
+        print(f"  {path}: {changed} new/changed chunks, {len(stale_ids)} removed, {len(chunk_ids) - changed} unchanged.")
+        # The file is finished once this item is written; stale rows go only then
+        self.embed_queue.put((path, [], (chunk_ids, stale_ids)))
+
+    def _embed_stage(self):
+        batch: List[Dict] = []
+        files: List[Tuple[str, Optional[Tuple[List[str], List[str]]]]] = []
+        while True:
+            item = self.embed_queue.get()
+            if item is not _DONE:
+                path, to_write, finish = item
+                batch.extend(to_write)
+                files.append((path, finish))
+                if len(batch) < self.flush_size:
+                    continue
+            if files:
+                try:
+                    pending = [rec for rec in batch if rec.get("vector") is None]
+                    if pending:
+                        vectors = self.store.embed_documents([rec["text"] for rec in pending])
+                        for rec, vector in zip(pending, vectors):
+                            rec["vector"] = vector
+                    self.write_queue.put((batch, files))
+                except Exception as e:
+                    for path, _ in files:
+                        print(f"  Error embedding {path}: {e}")
+                        self.errors[path] = str(e)
+                batch, files = [], []
+            if item is _DONE:
+                self.write_queue.put(_DONE)
+                return
+
+    def _write_stage(self):
+        while True:
+            item = self.write_queue.get()
+            if item is _DONE:
+                return
+            batch, files = item
+            try:
+                self.written += self.store.add_many(self.project_id, batch)
+            except Exception as e:
+                for path, _ in files:
+                    print(f"  Error writing {path}: {e}")
+                    self.errors[path] = str(e)
+                continue
+            for path, finish in files:
+                # Skip files with a failed window so they are retried on the next run
+                if finish is None or path in self.errors:
+                    continue
+                chunk_ids, stale_ids = finish
+                try:
+                    self.store.delete_ids(self.project_id, stale_ids)
+                    if self.on_file_done:
+                        self.on_file_done(path, chunk_ids)
+                except Exception as e:
+                    print(f"  Error finishing {path}: {e}")
+                    self.errors[path] = str(e)
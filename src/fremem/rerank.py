@@ -0,0 +1,124 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from fremem.cache import LRUCache
+
+logger = logging.getLogger("fremem")
+
+# Local cross-encoder used to re-score retrieved candidates
+RERANK_MODEL = os.environ.get("MCP_MEMORY_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Candidates fetched from the first-stage search and scored per query
+RERANK_CANDIDATES = int(os.environ.get("MCP_MEMORY_RERANK_CANDIDATES", "50"))
+# Per-request latency budget for the rerank stage (milliseconds)
+RERANK_BUDGET_MS = float(os.environ.get("MCP_MEMORY_RERANK_BUDGET_MS", "250"))
+# (query, project, chunk id, table version) -> score entries kept in memory (0 disables)
+RERANK_CACHE_SIZE = int(os.environ.get("MCP_MEMORY_RERANK_CACHE_SIZE", "4096"))
+# Pairs scored after loading to measure the model's speed before the first query
+CALIBRATION_PAIRS = 8
+
+
+def _cache_key(query: str, row: Dict[str, Any], version: Any) -> tuple:
+    return (query, row.get("project_id"), row["id"], version)
+
+
+class Reranker:
+    """
+    Cross-encoder rerank stage for search results.
+
+    Scores (query, chunk) pairs in one batched forward pass. Scores are cached by
+    (query, project, chunk id, table version), so repeated queries against an
+    unchanged table are never re-scored and any write invalidates them. Chunk ids
+    are only unique within a project, and projects may share one table. If the estimated
+    cost of scoring the uncached pairs exceeds the remaining budget, the
+    candidates are returned in their original order instead.
+
+    The model loads and is timed on a background thread (warm_up()); until
+    then no budget could be met, so searches keep their first-stage order.
+    """
+    def __init__(self, model_name: str = RERANK_MODEL, cache_size: int = RERANK_CACHE_SIZE):
+        self.model_name = model_name
+        self.model = None
+        self.cache = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        # Moving average of seconds per scored pair, used to predict the next pass
+        self.pair_seconds: Optional[float] = None
+        self.fallbacks = 0
+        self._loading = False
+
+    @property
+    def ready(self) -> bool:
+        """True once the model is loaded and its speed has been measured."""
+        return self.model is not None and self.pair_seconds is not None
+
+    def warm_up(self):
+        """Start loading and timing the cross-encoder on a background thread."""
+        with self._lock:
+            if self._loading or self.ready:
+                return
+            self._loading = True
+        threading.Thread(target=self._load, name="fremem-rerank-model", daemon=True).start()
+
+    def _load(self):
+        try:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError as e:
+                raise ImportError('reranking needs the torch extra (pip install "fremem[torch]")') from e
+            logger.info(f"Loading rerank model {self.model_name}")
+            model = CrossEncoder(self.model_name)
+            started = time.monotonic()
+            model.predict([("warm up", "calibration passage")] * CALIBRATION_PAIRS)
+            self.pair_seconds = (time.monotonic() - started) / CALIBRATION_PAIRS
+            self.model = model
+        except Exception as e:
+            # Left unloaded, so the next reranked search tries again
+            logger.error(f"Error loading rerank model {self.model_name}: {e}")
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], k: int, version: Any = None,
+               deadline: float = None) -> List[Dict[str, Any]]:
+        """
+        Top `k` of `candidates` by cross-encoder score, each with `rerank_score`.
+
+        `deadline` is a time.monotonic() value; when scoring would overrun it the
+        first `k` candidates are returned unchanged.
+        """
+        if not candidates:
+            return []
+        scores = {}
+        missing = []
+        for row in candidates:
+            score = self.cache.get(_cache_key(query, row, version))
+            if score is None:
+                missing.append(row)
+            else:
+                scores[row["id"]] = score
+
+        if missing:
+            if not self.ready:
+                # Loading takes seconds, far past any budget: keep this query's order
+                self.warm_up()
+                self.fallbacks += 1
+                logger.debug("Rerank skipped: model still loading")
+                return candidates[:k]
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if len(missing) * self.pair_seconds > remaining:
+                    self.fallbacks += 1
+                    logger.debug(f"Rerank skipped: {len(missing)} pairs would exceed the {remaining * 1000:.0f} ms left")
+                    return candidates[:k]
+            started = time.monotonic()
+            predicted = self.model.predict([(query, row["text"]) for row in missing])
+            per_pair = (time.monotonic() - started) / len(missing)
+            self.pair_seconds = 0.8 * self.pair_seconds + 0.2 * per_pair
+            for row, score in zip(missing, predicted):
+                scores[row["id"]] = float(score)
+                self.cache.put(_cache_key(query, row, version), float(score))
+
+        ranked = sorted(candidates, key=lambda r: scores[r["id"]], reverse=True)[:k]
+        return [dict(row, rerank_score=scores[row["id"]]) for row in ranked]
@@ -0,0 +1,135 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+
+from fremem.util import like_escape, sql_str
+
+# Metadata keys copied into typed columns so filters on them run inside LanceDB.
+# meta key -> (column, kind)
+PROMOTED_KEYS = {
+    "source": ("source", "str"),
+    "type": ("doc_type", "str"),
+    "chunk_index": ("chunk_index", "int"),
+    "page": ("page", "int"),
+    "tags": ("tags", "str_list"),
+}
+
+
+# Bumped whenever table_schema changes; fremem.migrations upgrades older tables
+SCHEMA_VERSION = 4
+
+
+def table_schema(dim: int) -> pa.Schema:
+    """Arrow schema of the memory_store table."""
+    return pa.schema([
+        pa.field("id", pa.string()),
+        pa.field("vector", pa.list_(pa.float32(), dim)),
+        pa.field("text", pa.string()),
+        pa.field("project_id", pa.string()),
+        pa.field("source", pa.string()),
+        pa.field("metadata_json", pa.string()),
+        pa.field("doc_type", pa.string()),
+        pa.field("chunk_index", pa.int64()),
+        pa.field("page", pa.int64()),
+        pa.field("tags", pa.list_(pa.string())),
+        # project_id + NUL + id: the single indexed key upserts into the shared table join on
+        pa.field("row_key", pa.string()),
+    ], metadata={"fremem.schema_version": str(SCHEMA_VERSION)})
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _as_int(value: Any) -> Optional[int]:
+    # Anything Python compares equal to an int (True, 3.0) is stored as that int
+    if isinstance(value, (int, bool)) or (isinstance(value, float) and value.is_integer()):
+        return int(value)
+    return None
+
+
+def _is_str_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+def promoted_columns(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Typed column values derived from metadata.
+
+    Values of an unexpected type are left NULL so a pushed-down filter can never
+    match a row the exact metadata comparison would reject.
+    """
+    source = meta.get("source", "")
+    return {
+        "source": source if isinstance(source, str) else "",
+        "doc_type": meta["type"] if isinstance(meta.get("type"), str) else None,
+        "chunk_index": _as_int(meta.get("chunk_index")),
+        "page": _as_int(meta.get("page")),
+        "tags": meta["tags"] if _is_str_list(meta.get("tags")) else [],
+    }
+
+
+def row_key(project_id: str, doc_id: str) -> str:
+    return f"{project_id}\0{doc_id}"
+
+
+def make_row(project_id: str, doc_id: str, text: str, vector: List[float], meta: Dict[str, Any]) -> Dict[str, Any]:
+    row = {
+        "row_key": row_key(project_id, doc_id),
+        "id": doc_id,
+        "vector": vector,
+        "text": text,
+        "project_id": project_id,
+        "metadata_json": json.dumps(meta),
+    }
+    row.update(promoted_columns(meta))
+    return row
+
+
+def metadata_like(key: str, val: str) -> str:
+    """
+    LIKE clause matching rows whose metadata_json holds `"key": "val"`.
+
+    Rows store metadata through json.dumps too, so this never misses a true
+    match. Backslashes from JSON escapes (quotes, non-ASCII) must be escaped too,
+    or LIKE reads them as escape characters and the pattern stops matching.
+    """
+    fragment = json.dumps(key) + ': ' + json.dumps(val)
+    return f"metadata_json LIKE {sql_str('%' + like_escape(fragment) + '%')} ESCAPE '\\'"
+
+
+def compile_filter(filter_meta: Optional[Dict[str, Any]]) -> Tuple[List[str], bool]:
+    """
+    Translate a metadata equality filter into SQL prefilter clauses.
+
+    Returns (clauses, exact). Promoted keys compile to exact column predicates;
+    other keys compile to a LIKE on metadata_json that may over-match, in which
+    case `exact` is False and results still need matches_filter().
+    """
+    clauses = []
+    exact = True
+    for key, val in (filter_meta or {}).items():
+        column, kind = PROMOTED_KEYS.get(key, (None, None))
+        if kind == "str" and isinstance(val, str) and (key != "source" or val):
+            clauses.append(f"{column} = {sql_str(val)}")
+        elif kind == "int" and _is_int(val):
+            clauses.append(f"{column} = {val}")
+        elif kind == "str_list" and _is_str_list(val) and val:
+            # Narrows to rows containing every tag; equality is confirmed in Python
+            clauses.append(f"array_has_all({column}, [{', '.join(sql_str(v) for v in val)}])")
+            exact = False
+        elif isinstance(val, str):
+            clauses.append(metadata_like(key, val))
+            exact = False
+        else:
+            # Numbers, objects etc. have several equal JSON spellings; check in Python only
+            exact = False
+    return clauses, exact
+
+
+def matches_filter(meta: Dict[str, Any], filter_meta: Optional[Dict[str, Any]]) -> bool:
+    for key, val in (filter_meta or {}).items():
+        if meta.get(key) != val:
+            return False
+    return True
@@ -1,5 +1,6 @@
 import asyncio
 import sys
+import threading
 import traceback
 import json
 from mcp.server import Server
@@ -8,9 +9,30 @@ from mcp.server.stdio import stdio_server
 # See README for usage examples
 import mcp.types as types
 from fremem.db import store
+from fremem.executor import StoreExecutor
 
 server = Server("fremem")
 
+# Store calls are blocking (model inference, LanceDB I/O); run them off the event loop
+executor = StoreExecutor()
+
+# Tools that embed text and so need the model loaded
+EMBEDDING_TOOLS = {"memory_search", "memory_add", "memory_add_batch"}
+
+def start_warm_up():
+    """Open the store and load the embedding model in the background."""
+    def warm_up():
+        try:
+            store.warm_up()
+            store.initialize()
+        except Exception as e:
+            print(f"Error warming up store: {e}", file=sys.stderr)
+    threading.Thread(target=warm_up, name="fremem-warm-up", daemon=True).start()
+
+async def wait_for_model():
+    # Wait without holding a store worker, so other tools keep being served meanwhile
+    await asyncio.wrap_future(store.warm_up())
+
 @server.list_tools()
 async def list_tools() -> list[types.Tool]:
     return [
@@ -37,6 +59,31 @@ async def list_tools() -> list[types.Tool]:
                         "type": "object",
                         "description": "Optional metadata filter (e.g. {'type': 'decision'})",
                         "additionalProperties": True
+                    },
+                    "min_score": {
+                        "type": "number",
+                        "description": "Only return results with similarity score >= this (0..1)"
+                    },
+                    "max_distance": {
+                        "type": "number",
+                        "description": "Only return results with cosine distance <= this"
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["vector", "keyword", "hybrid"],
+                        "description": "vector (semantic), keyword (exact terms/identifiers) or hybrid (both, rank-fused)"
+                    },
+                    "vector_weight": {
+                        "type": "number",
+                        "description": "Hybrid mode: weight of the semantic ranking (default 1.0)"
+                    },
+                    "keyword_weight": {
+                        "type": "number",
+                        "description": "Hybrid mode: weight of the keyword ranking (default 1.0)"
+                    },
+                    "rerank": {
+                        "type": "boolean",
+                        "description": "Re-score candidates with a cross-encoder for better precision (slower)"
                     }
                 },
                 "required": ["project_id", "q"]
@@ -69,13 +116,48 @@ async def list_tools() -> list[types.Tool]:
                 "required": ["project_id", "id", "text"]
             }
         ),
+        types.Tool(
+            name="memory_add_batch",
+            description="Add many memory fragments to the project's vector store in one call.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "project_id": {
+                        "type": "string",
+                        "description": "Unique identifier for the project scope"
+                    },
+                    "items": {
+                        "type": "array",
+                        "description": "Memory fragments to add or update",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "string", "description": "Unique ID for this memory fragment"},
+                                "text": {"type": "string", "description": "The text content"},
+                                "meta": {"type": "object", "description": "Optional JSON metadata", "additionalProperties": True}
+                            },
+                            "required": ["id", "text"]
+                        }
+                    }
+                },
+                "required": ["project_id", "items"]
+            }
+        ),
         types.Tool(
             name="memory_list_sources",
             description="List all files/sources ingested for a project.",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "project_id": {"type": "string", "description": "Project ID"}
+                    "project_id": {"type": "string", "description": "Project ID"},
+                    "prefix": {"type": "string", "description": "Only list sources starting with this"},
+                    "offset": {"type": "integer", "description": "Sources to skip (default: 0)", "default": 0},
+                    "limit": {"type": "integer", "description": "Maximum number of sources to return"},
+                    "details": {
+                        "type": "boolean",
+                        "description": "Include chunk count, bytes, last ingest time and content hash per source",
+                        "default": False
+                    }
                 },
                 "required": ["project_id"]
             }
@@ -94,7 +176,7 @@ async def list_tools() -> list[types.Tool]:
         ),
         types.Tool(
             name="memory_stats",
-            description="Get statistics for a project's memory (chunk count).",
+            description="Get statistics for a project's memory: chunk and source counts, plus table version, fragments, on-disk bytes and indexed/unindexed rows.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -131,23 +213,38 @@ async def read_resource(uri: types.AnyUrl) -> str:
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     try:
+        # Keyword search matches text only, so it doesn't need the model either
+        if name in EMBEDDING_TOOLS and not (name == "memory_search" and arguments.get("mode") == "keyword"):
+            await wait_for_model()
+        
         if name == "memory_search":
             project_id = arguments["project_id"]
             q = arguments["q"]
             k = arguments.get("k", 5)
             metadata_filter = arguments.get("filter", None)
+            min_score = arguments.get("min_score", None)
+            max_distance = arguments.get("max_distance", None)
             
-            results = store.search(project_id, q, k, filter_meta=metadata_filter)
+            results = await executor.run_read(store.search, project_id, q, k, filter_meta=metadata_filter,
+                                              min_score=min_score, max_distance=max_distance,
+                                              mode=arguments.get("mode"),
+                                              vector_weight=arguments.get("vector_weight"),
+                                              keyword_weight=arguments.get("keyword_weight"),
+                                              rerank=arguments.get("rerank"))
             
             # Format results for the LLM
             formatted_results = []
             for i, res in enumerate(results):
-                # distance is typically lower = better for L2. 
-                # Just show it as "Distance". 
-                # If we knew it was cosine similarity, we'd say Score.
-                # LanceDB default is L2.
-                score_label = "Distance"
-                score_val = res.get('_distance', 'N/A')
+                # Score is cosine similarity (higher = better), distance = 1 - score.
+                # Keyword-only matches have a BM25 score instead.
+                if res.get('rerank_score') is not None:
+                    score_label, score_val = "Rerank score", f"{res['rerank_score']:.3f}"
+                elif res.get('score') is not None:
+                    score_label, score_val = "Score", f"{res['score']:.3f}"
+                elif res.get('_score') is not None:
+                    score_label, score_val = "Keyword score", f"{res['_score']:.3f}"
+                else:
+                    score_label, score_val = "Score", "N/A"
                 
                 formatted_results.append(f"Result {i+1} ({score_label}: {score_val}):\n{res['text']}\nMetadata: {json.dumps(res['metadata'])}")
             
@@ -163,30 +260,62 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
             text = arguments["text"]
             meta = arguments.get("meta", {})
             
-            store.add(project_id, doc_id, text, meta)
+            await executor.run_write(store.add, project_id, doc_id, text, meta)
             
             return [types.TextContent(type="text", text=f"Successfully added memory '{doc_id}' to project '{project_id}'")]
 
+        elif name == "memory_add_batch":
+            project_id = arguments["project_id"]
+            items = arguments["items"]
+            
+            # Validate every item up front so one bad entry doesn't fail the batch
+            results = []
+            records = []
+            for i, item in enumerate(items):
+                doc_id = item.get("id") if isinstance(item, dict) else None
+                text = item.get("text") if isinstance(item, dict) else None
+                meta = item.get("meta") if isinstance(item, dict) else None
+                if not isinstance(doc_id, str) or not doc_id:
+                    results.append({"index": i, "id": doc_id, "status": "error", "error": "missing 'id'"})
+                elif not isinstance(text, str):
+                    results.append({"index": i, "id": doc_id, "status": "error", "error": "missing 'text'"})
+                elif meta is not None and not isinstance(meta, dict):
+                    results.append({"index": i, "id": doc_id, "status": "error", "error": "'meta' must be an object"})
+                else:
+                    records.append({"id": doc_id, "text": text, "meta": meta or {}})
+                    results.append({"index": i, "id": doc_id, "status": "added"})
+            
+            if records:
+                await executor.run_write(store.add_many, project_id, records)
+            
+            added = sum(1 for r in results if r["status"] == "added")
+            summary = {"project_id": project_id, "added": added, "failed": len(results) - added, "results": results}
+            return [types.TextContent(type="text", text=json.dumps(summary, indent=2))]
+
         elif name == "memory_list_sources":
             project_id = arguments["project_id"]
-            sources = store.list_sources(project_id)
+            page = (arguments.get("prefix"), arguments.get("offset", 0), arguments.get("limit"))
+            if arguments.get("details"):
+                sources = await executor.run_read(store.source_catalog, project_id, *page)
+            else:
+                sources = await executor.run_read(store.list_sources, project_id, *page)
             return [types.TextContent(type="text", text=json.dumps(sources, indent=2))]
 
         elif name == "memory_delete_source":
             project_id = arguments["project_id"]
             source = arguments["source"]
-            success = store.delete_source(project_id, source)
+            success = await executor.run_write(store.delete_source, project_id, source)
             msg = f"Deleted source '{source}'" if success else f"Failed to delete source '{source}' (not found?)"
             return [types.TextContent(type="text", text=msg)]
 
         elif name == "memory_stats":
             project_id = arguments["project_id"]
-            stats = store.get_stats(project_id)
+            stats = await executor.run_read(store.get_stats, project_id)
             return [types.TextContent(type="text", text=json.dumps(stats, indent=2))]
 
         elif name == "memory_reset":
             project_id = arguments["project_id"]
-            success = store.delete_project(project_id)
+            success = await executor.run_write(store.delete_project, project_id)
             msg = f"Reset project '{project_id}'" if success else f"Failed to reset project '{project_id}'"
             return [types.TextContent(type="text", text=msg)]
             
@@ -200,12 +329,12 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
         return [types.TextContent(type="text", text=err_msg)]
 
 async def main():
-    # Initialize DB (lazy loading in db.py, but good to prep)
-    store.initialize()
-    
     # Run stdio server
     options = server.create_initialization_options()
     async with stdio_server() as (read_stream, write_stream):
+        # Loading torch and the model takes seconds; do it while the client handshakes
+        # so initialize/list_tools answer immediately
+        start_warm_up()
         await server.run(
             read_stream,
             write_stream,
@@ -1,11 +1,15 @@
 import logging
+import multiprocessing
 import os
 from starlette.applications import Starlette
+from starlette.responses import JSONResponse
 from starlette.routing import Route, Mount
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
 from mcp.server.sse import SseServerTransport
-from fremem.server import server
+from fremem.batching import QUERY_BATCH_WAIT_MS
+from fremem.db import store
+from fremem.server import executor, server, start_warm_up
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -16,6 +20,11 @@ logger = logging.getLogger("fremem-http")
 # For local use, "/messages" is usually sufficient if the client resolves it relative to the connection.
 transport = SseServerTransport("/messages")
 
+# Worker processes serving the same MCP_MEMORY_PATH, each on its own port (PORT, PORT+1, ...).
+# SSE sessions live in the worker that opened them, so a client's POSTs must reach
+# that same worker; separate ports (behind a sticky proxy) guarantee it.
+HTTP_WORKERS = int(os.environ.get("MCP_MEMORY_HTTP_WORKERS", "1"))
+
 async def handle_sse(scope, receive, send):
     """
     Handle incoming SSE connections.
@@ -36,7 +45,28 @@ async def handle_messages(scope, receive, send):
     """
     await transport.handle_post_message(scope, receive, send)
 
+async def handle_metrics(request):
+    """
+    Serving metrics: query micro-batching, store worker queue depth and
+    hit rates of the query-embedding and rerank-score caches.
+    """
+    batcher = store.query_batcher
+    return JSONResponse({
+        "query_batching": batcher.metrics() if batcher is not None else None,
+        "store_pending": executor.pending,
+        # The query cache is created when the store opens
+        "query_cache": store.query_cache.info() if store.initialized else None,
+        "rerank_cache": store.reranker.cache.info(),
+    })
+
+def on_startup():
+    # Many SSE clients search at once here, so batch their query embeddings
+    if QUERY_BATCH_WAIT_MS > 0:
+        store.enable_query_batching()
+    start_warm_up()
+
 routes = [
+    Route("/metrics", endpoint=handle_metrics),
     Mount("/sse", app=handle_sse),
     Mount("/messages", app=handle_messages),
 ]
@@ -50,10 +80,46 @@ middleware = [
     )
 ]
 
-app = Starlette(debug=True, routes=routes, middleware=middleware)
+app = Starlette(debug=True, routes=routes, middleware=middleware, on_startup=[on_startup])
 
-if __name__ == "__main__":
+def run_worker(port: int):
     import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=port)
+
+def prepare_store():
+    """
+    Upgrade the schema and finish moving projects to their own tables once,
+    before any worker serves reads: workers never see a half-migrated store.
+    """
+    store.initialize()
+    store.router.migrate()
+
+def main():
     # Allow passing port via env var
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = max(1, HTTP_WORKERS)
+    if workers == 1:
+        run_worker(port)
+        return
+
+    # Workers only see each other's writes by re-checking table versions
+    os.environ.setdefault("MCP_MEMORY_READ_CONSISTENCY_SECONDS", "1")
+    prepare_store()
+    # Spawned, not forked: each worker opens its own LanceDB handles and model
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=run_worker, args=(port + i,), name=f"fremem-http-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {workers} workers on ports {port}-{port + workers - 1}")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+if __name__ == "__main__":
+    main()
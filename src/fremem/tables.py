@@ -0,0 +1,197 @@
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from fremem.util import safe_name, sql_str, table_names
+
+logger = logging.getLogger("fremem")
+
+# Table name prefix for per-project storage
+PROJECT_TABLE_PREFIX = "project_"
+# Rows copied per write when moving a project out of the shared table
+MIGRATE_BATCH_ROWS = 4096
+
+
+def project_table_name(project_id: str) -> str:
+    return f"{PROJECT_TABLE_PREFIX}{safe_name(project_id)}"
+
+
+class _WriteLock:
+    """A project's lock followed by the store-wide write lock, taken and released together."""
+    def __init__(self, project_lock: threading.RLock, write_lock):
+        self.project_lock = project_lock
+        self.write_lock = write_lock
+
+    def __enter__(self):
+        self.project_lock.acquire()
+        try:
+            self.write_lock.acquire()
+        except BaseException:
+            self.project_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.write_lock.release()
+        self.project_lock.release()
+
+
+class TableRouter:
+    """
+    Decides which LanceDB table holds a project's memories.
+
+    In "shared" mode every project lives in the shared table and is scoped by a
+    project_id predicate. In "per_project" mode each project has its own table,
+    so searches, index builds, compaction and deletes only touch that project's
+    data. Projects still present in the shared table keep being served from it
+    until migrate() has copied them over, one project at a time; writes to a
+    project wait while it is being copied, reads never do.
+
+    With a `write_lock` (see fremem.locking), project locks also take it, so
+    writers in other processes sharing the store are serialized too. Other
+    processes may then drop, create or migrate tables at any time, so cached
+    handles are only trusted while the table is still listed, writers reopen
+    theirs under the write lock, and pending projects are re-checked against
+    the shared table.
+    """
+    def __init__(self, db, shared, schema: pa.Schema, mode: str = "shared", write_lock=None):
+        if mode not in ("shared", "per_project"):
+            raise ValueError(f"Unknown storage mode: {mode}")
+        self.db = db
+        self.shared = shared
+        self.schema = schema
+        self.mode = mode
+        self.write_lock = write_lock
+        self._tables = {}
+        self._locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+        self.pending = set()
+        if mode == "per_project" and shared.count_rows() > 0:
+            column = shared.to_lance().to_table(columns=["project_id"]).column("project_id")
+            self.pending = set(pc.unique(column).to_pylist())
+
+    def lock(self, project_id: str):
+        """Lock held by writers of a project (and by its migration)."""
+        with self._lock:
+            project_lock = self._locks.setdefault(project_id, threading.RLock())
+        if self.write_lock is None:
+            return project_lock
+        return _WriteLock(project_lock, self.write_lock)
+
+    def resolve(self, project_id: str, create: bool = False) -> Tuple[Optional[object], bool]:
+        """
+        Return (table, shared) for a project.
+
+        `shared` tells callers to scope queries with a project_id predicate. The
+        table is None for a per-project store that has never been written to,
+        unless `create` is set.
+        """
+        if self.mode == "shared" or self.is_pending(project_id):
+            return self.shared, True
+        name = project_table_name(project_id)
+        exists = name in table_names(self.db)
+        with self._lock:
+            tbl = self._tables.get(name)
+            if not exists:
+                # Possibly dropped by another process: never reuse its handle
+                self._tables.pop(name, None)
+                if not create:
+                    return None, False
+                tbl = self.db.create_table(name, schema=self.schema)
+            elif tbl is None or self._writing():
+                # Writers commit through a fresh handle, so never to a dropped or recreated table
+                tbl = self.db.open_table(name)
+            self._tables[name] = tbl
+            return tbl, False
+
+    def _writing(self) -> bool:
+        return self.write_lock is not None and self.write_lock.held()
+
+    def is_pending(self, project_id: str) -> bool:
+        """True while a project is still served from the shared table."""
+        if project_id not in self.pending:
+            return False
+        # Another process may have moved it since: its table exists and the shared rows are gone
+        if project_table_name(project_id) in table_names(self.db) and \
+                self.shared.count_rows(f"project_id = {sql_str(project_id)}") == 0:
+            with self._lock:
+                self.pending.discard(project_id)
+            return False
+        return True
+
+    def evict(self, name: str) -> bool:
+        """Forget the cached handle of a project table; returns False if none was cached."""
+        with self._lock:
+            return self._tables.pop(name, None) is not None
+
+    def tables(self) -> Dict[str, object]:
+        """Every table holding memories, by name (the shared table first)."""
+        tables = {self.shared.name: self.shared}
+        if self.mode == "per_project":
+            names = {n for n in table_names(self.db) if n.startswith(PROJECT_TABLE_PREFIX)}
+            with self._lock:
+                # Tables dropped by another process since the last call
+                for name in set(self._tables) - names:
+                    del self._tables[name]
+                for name in sorted(names):
+                    if name not in self._tables:
+                        self._tables[name] = self.db.open_table(name)
+                    tables[name] = self._tables[name]
+        return tables
+
+    def drop(self, project_id: str) -> bool:
+        """Drop a project's own table; returns False if it has none."""
+        name = project_table_name(project_id)
+        with self._lock:
+            self._tables.pop(name, None)
+            if name not in table_names(self.db):
+                return False
+            self.db.drop_table(name)
+            return True
+
+    def migrate(self) -> int:
+        """Move every pending project out of the shared table; returns rows moved."""
+        moved = 0
+        for project_id in sorted(self.pending):
+            try:
+                moved += self.migrate_project(project_id)
+            except Exception as e:
+                logger.error(f"Error moving project {project_id} to its own table: {e}")
+        return moved
+
+    def migrate_project(self, project_id: str) -> int:
+        """
+        Copy one project into its own table, switch reads to it, then delete the shared rows.
+
+        Copying upserts by ID, so a migration interrupted by a crash is simply
+        redone on the next start.
+        """
+        predicate = f"project_id = {sql_str(project_id)}"
+        with self.lock(project_id):
+            if project_id not in self.pending:
+                return 0
+            name = project_table_name(project_id)
+            with self._lock:
+                if name in table_names(self.db):
+                    target = self.db.open_table(name)
+                else:
+                    target = self.db.create_table(name, schema=self.schema)
+            moved = 0
+            for batch in self.shared.to_lance().to_batches(filter=predicate, batch_size=MIGRATE_BATCH_ROWS):
+                if batch.num_rows == 0:
+                    continue
+                target.merge_insert("id")\
+                    .when_matched_update_all()\
+                    .when_not_matched_insert_all()\
+                    .execute(pa.Table.from_batches([batch]).select(self.schema.names))
+                moved += batch.num_rows
+            with self._lock:
+                self._tables[name] = target
+                # Readers switch over before the shared rows go away, so the project never looks empty
+                self.pending.discard(project_id)
+            self.shared.delete(predicate)
+        logger.info(f"Moved {moved} rows of project {project_id} to table {name}")
+        return moved
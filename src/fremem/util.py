@@ -0,0 +1,31 @@
+import hashlib
+import re
+from typing import Any, List
+
+
+def sql_str(value: Any) -> str:
+    """Quote a value as a SQL string literal for LanceDB filters."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def like_escape(value: str) -> str:
+    """Escape LIKE wildcards so `value` matches literally (with ESCAPE '\\')."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def table_names(db) -> List[str]:
+    """Names of the tables in a LanceDB connection (whichever list_tables() shape it returns)."""
+    tables = db.list_tables()
+    if hasattr(tables, "tables"):
+        tables = tables.tables
+    return list(tables)
+
+
+def safe_name(value: str) -> str:
+    """
+    File- and table-name-safe form of an arbitrary ID: a readable prefix plus a
+    hash, so distinct IDs never map to the same name.
+    """
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", value)[:64]
+    digest = hashlib.sha256(value.encode("utf-8")).hexdigest()[:12]
+    return f"{safe}-{digest}"
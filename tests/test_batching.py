@@ -0,0 +1,78 @@
+import threading
+import time
+import pytest
+from fremem.batching import EmbeddingScheduler
+
+class FakeModel:
+    """Embeds text as [len(text)], recording each batch it is given."""
+    def __init__(self, delay=0.0):
+        self.batches = []
+        self.delay = delay
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        time.sleep(self.delay)
+        return [[float(len(t))] for t in texts]
+
+def run_concurrently(scheduler, texts):
+    results = {}
+    def worker(text):
+        results[text] = scheduler.encode(text)
+    threads = [threading.Thread(target=worker, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_concurrent_requests_share_a_batch():
+    model = FakeModel()
+    scheduler = EmbeddingScheduler(model.encode, max_batch=32, max_wait_ms=200)
+    texts = ["a" * n for n in range(1, 9)]
+    results = run_concurrently(scheduler, texts)
+    
+    assert results == {t: [float(len(t))] for t in texts}
+    assert len(model.batches) < len(texts)
+    metrics = scheduler.metrics()
+    assert metrics["requests"] == len(texts)
+    assert metrics["batches"] == len(model.batches)
+    assert metrics["max_batch_size"] > 1
+
+def test_batch_size_is_capped():
+    model = FakeModel(delay=0.05)
+    scheduler = EmbeddingScheduler(model.encode, max_batch=2, max_wait_ms=100)
+    run_concurrently(scheduler, [str(n) for n in range(6)])
+    assert all(len(b) <= 2 for b in model.batches)
+
+def test_duplicate_texts_embedded_once():
+    model = FakeModel()
+    scheduler = EmbeddingScheduler(model.encode, max_batch=32, max_wait_ms=200)
+    done = []
+    threads = [threading.Thread(target=lambda: done.append(scheduler.encode("same"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert done == [[4.0]] * 4
+    assert sum(len(b) for b in model.batches) < 4
+
+def test_errors_reach_every_caller():
+    def fail(texts):
+        raise RuntimeError("model crashed")
+    scheduler = EmbeddingScheduler(fail, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        scheduler.encode("query")
+    # The dispatcher survives and serves later requests
+    scheduler.encode_batch = FakeModel().encode
+    assert scheduler.encode("abc") == [3.0]
+
+def test_store_search_uses_batcher(mock_store):
+    calls = []
+    class Model:
+        def encode(self, texts, **kwargs):
+            calls.append(texts)
+            return [[0.1] * 384 for _ in texts]
+    mock_store.model = Model()
+    mock_store.enable_query_batching(max_wait_ms=1)
+    assert mock_store._encode_query("hello") == [0.1] * 384
+    assert calls == [["hello"]]
@@ -0,0 +1,88 @@
+import time
+import pytest
+from unittest.mock import patch
+from fremem.cache import LRUCache, normalize_query
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recent
+    cache.put("c", 3)           # evicts "b"
+    
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    info = cache.info()
+    assert info["size"] == 2
+    assert info["hits"] == 2
+    assert info["misses"] == 1
+
+def test_lru_disabled():
+    cache = LRUCache(maxsize=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_normalize_query():
+    assert normalize_query("  Project   Conventions\n") == "project conventions"
+
+def test_search_reuses_query_embedding(mock_store):
+    mock_store.add("cache-proj", "doc1", "architecture decisions")
+    mock_store.query_cache.clear()
+    
+    original_encode = mock_store.model.encode
+    with patch.object(mock_store.model, "encode", side_effect=original_encode) as spy:
+        mock_store.search("cache-proj", "architecture decisions")
+        mock_store.search("cache-proj", "architecture decisions")
+    
+    assert spy.call_count == 1
+    assert mock_store.query_cache.info()["hits"] == 1
+
+def test_embedding_cache_skips_model_for_known_text(mock_store):
+    mock_store.add_many("emb-proj", [
+        {"id": "c1", "text": "unchanged chunk one"},
+        {"id": "c2", "text": "unchanged chunk two"},
+    ])
+    
+    original_encode = mock_store.model.encode
+    with patch.object(mock_store.model, "encode", side_effect=original_encode) as spy:
+        # Re-adding identical texts must come entirely from the cache
+        mock_store.add_many("emb-proj", [
+            {"id": "c1", "text": "unchanged chunk one"},
+            {"id": "c2", "text": "unchanged chunk two"},
+        ])
+        assert spy.call_count == 0
+        
+        # Only the new text reaches the model
+        mock_store.add("emb-proj", "c3", "a brand new chunk")
+        assert spy.call_count == 1
+        assert spy.call_args[0][0] == ["a brand new chunk"]
+
+def test_embedding_cache_persists_across_restart(mock_store):
+    mock_store.add("emb-proj", "c1", "persistent text")
+    
+    # Re-open the store on the same path
+    mock_store.initialized = False
+    mock_store.initialize()
+    
+    key = mock_store.embedding_cache.key("persistent text")
+    assert key in mock_store.embedding_cache.get_many([key])
+
+def test_embedding_cache_key_index_maintained_after_writes(mock_store):
+    from fremem import indexing
+    # Only the cache's upkeep is under test here
+    with patch("fremem.db.INDEX_CHECK_ROWS", 3), patch.object(mock_store, "_maintain_indexes"):
+        mock_store.add("emb-proj", "c1", "first cached text")
+        assert indexing.index_stats(mock_store.embedding_cache.tbl, "key") is None
+        mock_store.add_many("emb-proj", [
+            {"id": "c2", "text": "second cached text"},
+            {"id": "c3", "text": "third cached text"},
+        ])
+        
+        # Built on a background thread once enough new rows reached the cache
+        lock = mock_store._index_lock(mock_store.embedding_cache.table_name)
+        deadline = time.monotonic() + 10
+        while indexing.index_stats(mock_store.embedding_cache.tbl, "key") is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        with lock:
+            assert indexing.index_stats(mock_store.embedding_cache.tbl, "key") is not None
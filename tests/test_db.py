@@ -60,3 +60,210 @@ def test_delete_project(mock_store):
     
     # Verify empty
     assert len(mock_store.search("proj-delete", "content")) == 0
+
+def test_add_many(mock_store):
+    """Test bulk adding documents and updating existing IDs in one call."""
+    project_id = "bulk-project"
+    mock_store.add(project_id, "doc1", "old text", {"source": "a.md"})
+
+    written = mock_store.add_many(project_id, [
+        {"id": "doc1", "text": "new text about rivers", "meta": {"source": "a.md"}},
+        {"id": "doc2", "text": "mountains and valleys", "meta": {"source": "b.md"}},
+        {"id": "doc3", "text": "oceans and tides"},
+    ])
+    assert written == 3
+
+    results = mock_store.search(project_id, "rivers", k=10)
+    assert len(results) == 3
+    by_id = {r["id"]: r for r in results}
+    assert by_id["doc1"]["text"] == "new text about rivers"
+    assert by_id["doc2"]["source"] == "b.md"
+    assert by_id["doc3"]["metadata"] == {}
+
+def test_add_many_empty(mock_store):
+    assert mock_store.add_many("bulk-project", []) == 0
+
+def test_ensure_indexes_skips_small_table(mock_store):
+    mock_store.add("idx-proj", "doc1", "tiny table")
+    assert mock_store.ensure_indexes(force=True)["vector"] == "skipped (too few rows)"
+
+def test_ensure_indexes_builds_ann_index(mock_store):
+    from unittest.mock import patch
+    mock_store.add_many("idx-proj", [
+        {"id": f"doc{i}", "text": f"memory number {i} about topic {i % 7}"} for i in range(300)
+    ])
+    
+    with patch("fremem.indexing.INDEX_MIN_ROWS", 256):
+        assert mock_store.ensure_indexes()["vector"] == "created"
+        assert mock_store.ensure_indexes()["vector"] == "up to date"
+    
+    results = mock_store.search("idx-proj", "memory number 5", k=3, nprobes=1, refine_factor=5)
+    assert len(results) == 3
+
+def test_scalar_indexes_created(mock_store):
+    from fremem import indexing
+    mock_store.add("proj-A", "docA", "alpha content", {"source": "a.md"})
+    mock_store.add("proj-B", "docB", "beta content", {"source": "b.md"})
+    
+    results = mock_store.ensure_indexes(force=True)
+    for column in indexing.SCALAR_INDEXES:
+        assert results[column] in ("created", "rebuilt")
+        assert indexing.index_stats(mock_store.tbl, column) is not None
+    
+    # Filtered search and deletes still isolate projects through the indexes
+    assert [r["id"] for r in mock_store.search("proj-A", "content", k=5)] == ["docA"]
+    mock_store.delete_source("proj-B", "b.md")
+    assert mock_store.search("proj-B", "content", k=5) == []
+    assert len(mock_store.search("proj-A", "content", k=5)) == 1
+
+def test_migrates_old_schema(temp_db_path):
+    """A v0.2 table gains the promoted metadata columns on open."""
+    import lancedb
+    from unittest.mock import patch
+    from fremem.db import VectorStore
+    
+    db = lancedb.connect(temp_db_path)
+    db.create_table("memory_store", data=[{
+        "id": "old1",
+        "vector": [0.1] * 384,
+        "text": "legacy memory",
+        "project_id": "legacy",
+        "source": "old.md",
+        "metadata_json": json.dumps({"source": "old.md", "type": "decision"}),
+    }])
+    
+    with patch("fremem.db.DB_PATH", temp_db_path):
+        VectorStore._instance = None
+        store = VectorStore()
+        store.initialize()
+        
+        assert "doc_type" in store.tbl.schema.names
+        results = store.search("legacy", "legacy memory", k=5, filter_meta={"type": "decision"})
+        assert [r["id"] for r in results] == ["old1"]
+        assert results[0]["source"] == "old.md"
+
+def test_per_project_storage_migrates_shared_table(mock_store, temp_db_path):
+    """Switching to per-project tables moves existing projects out of memory_store."""
+    from unittest.mock import patch
+    from fremem.db import VectorStore
+    from fremem.tables import project_table_name
+    
+    mock_store.add("proj-A", "docA", "alpha content", {"source": "a.md"})
+    mock_store.add("proj-B", "docB", "beta content", {"source": "b.md"})
+    
+    # The move is run by hand below instead of on a background thread
+    with patch("fremem.db.DB_PATH", temp_db_path), patch("fremem.db.STORAGE_MODE", "per_project"), \
+            patch.object(VectorStore, "_migrate_projects"):
+        VectorStore._instance = None
+        store = VectorStore()
+        store.initialize()
+        
+        # Still served from the shared table until moved
+        assert [r["id"] for r in store.search("proj-A", "content", k=5)] == ["docA"]
+        store.router.migrate()
+        
+        assert store.router.pending == set()
+        assert store.tbl.count_rows() == 0
+        assert [r["id"] for r in store.search("proj-A", "content", k=5)] == ["docA"]
+        assert store.search("proj-A", "content", k=5, filter_meta={"source": "a.md"})[0]["id"] == "docA"
+        
+        # New projects get their own table; deleting a project drops it
+        store.add("proj-C", "docC", "gamma content")
+        tables = store.router.tables()
+        assert project_table_name("proj-C") in tables
+        assert store.delete_project("proj-B")
+        assert project_table_name("proj-B") not in store.router.tables()
+        assert store.search("proj-B", "content", k=5) == []
+        assert [r["id"] for r in store.search("proj-C", "content", k=5)] == ["docC"]
+
+def test_optimize_compacts_fragments(mock_store):
+    from unittest.mock import patch
+    from fremem import optimize
+    for i in range(10):
+        mock_store.add("opt-proj", f"doc{i}", f"memory {i}")
+    mock_store.add("opt-proj", "doc0", "memory 0 updated")
+    
+    before = optimize.table_health(mock_store.tbl)
+    assert before["num_fragments"] >= 10
+    
+    with patch("fremem.optimize.COMPACT_MIN_FRAGMENTS", 1000):
+        assert mock_store.optimize()["memory_store/compact"] == "skipped (healthy)"
+    
+    results = mock_store.optimize(force=True)
+    assert "fragments" in results["memory_store/compact"]
+    after = optimize.table_health(mock_store.tbl)
+    assert after["num_fragments"] < before["num_fragments"]
+    assert after["num_deleted_rows"] == 0
+    assert after["num_rows"] == 10
+    assert mock_store.search("opt-proj", "memory 0 updated", k=1)[0]["text"] == "memory 0 updated"
+
+def test_upsert_is_single_commit_and_handles_quotes(mock_store):
+    doc_id = "it's \"quoted\""
+    mock_store.add("upsert-proj", doc_id, "first version")
+    mock_store.add("other-proj", doc_id, "other project")
+    version = mock_store.tbl.version
+    
+    mock_store.add("upsert-proj", doc_id, "second version")
+    assert mock_store.tbl.version == version + 1
+    
+    rows = mock_store.search("upsert-proj", "version", k=5)
+    assert [(r["id"], r["text"]) for r in rows] == [(doc_id, "second version")]
+    assert mock_store.search("other-proj", "project", k=5)[0]["text"] == "other project"
+    
+    # Batches upsert existing IDs and insert new ones in one commit too
+    version = mock_store.tbl.version
+    mock_store.add_many("upsert-proj", [
+        {"id": doc_id, "text": "third version"},
+        {"id": "new", "text": "brand new"},
+    ])
+    assert mock_store.tbl.version == version + 1
+    assert mock_store.tbl.count_rows("project_id = 'upsert-proj'") == 2
+    # Shared-table upserts join on the indexed row key
+    rows = mock_store.tbl.search(None).where("id = 'new'").to_list()
+    assert rows[0]["row_key"] == "upsert-proj\0new"
+
+def test_migration_streams_and_resumes(temp_db_path):
+    """An interrupted migration picks up where it stopped without duplicating rows."""
+    import lancedb
+    from unittest.mock import patch
+    from fremem import migrations
+    from fremem.schema import SCHEMA_VERSION
+    
+    db = lancedb.connect(temp_db_path)
+    # A v0.1 table: no source column, written in three fragments
+    for i in range(3):
+        rows = [{
+            "id": f"old{i}-{j}",
+            "vector": [0.1] * 8,
+            "text": f"legacy memory {i} {j}",
+            "project_id": "legacy",
+            "metadata_json": json.dumps({"source": f"f{i}.md", "page": j}),
+        } for j in range(5)]
+        if i == 0:
+            tbl = db.create_table("memory_store", data=rows)
+        else:
+            tbl.add(rows)
+    
+    real_transform = migrations._transform
+    calls = []
+    def flaky(batch, from_version, target):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("interrupted")
+        return real_transform(batch, from_version, target)
+    
+    with patch("fremem.migrations._transform", side_effect=flaky):
+        with pytest.raises(RuntimeError):
+            migrations.migrate_table(db, temp_db_path, "memory_store", batch_rows=2)
+    
+    # Untouched until the swap
+    assert "page" not in db.open_table("memory_store").schema.names
+    
+    assert migrations.migrate_table(db, temp_db_path, "memory_store", batch_rows=2)
+    tbl = db.open_table("memory_store")
+    assert migrations.schema_version(tbl.schema) == SCHEMA_VERSION
+    assert tbl.count_rows() == 15
+    rows = tbl.search(None).where("id = 'old2-3'").to_list()
+    assert rows[0]["source"] == "f2.md" and rows[0]["page"] == 3
+    assert rows[0]["row_key"] == "legacy\0old2-3"
+    assert not migrations.migrate_table(db, temp_db_path, "memory_store")
@@ -0,0 +1,84 @@
+import sys
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from fremem import embeddings
+from fremem.embeddings import EmbeddingBackend, OnnxBackend, TorchBackend, load_backend, model_id
+
+class FakeTokenizer:
+    """One token per word, id = word length, padded to the longest text."""
+    def encode_batch(self, texts):
+        words = [t.split() for t in texts]
+        width = max(len(w) for w in words)
+        return [
+            SimpleNamespace(
+                ids=[len(x) for x in w] + [0] * (width - len(w)),
+                attention_mask=[1] * len(w) + [0] * (width - len(w)),
+                type_ids=[0] * width,
+            )
+            for w in words
+        ]
+
+class FakeSession:
+    """Token embedding = [id, 1]; padding tokens get garbage that pooling must ignore."""
+    def __init__(self):
+        self.batches = []
+
+    def run(self, outputs, feed):
+        self.batches.append(feed["input_ids"].shape[0])
+        ids = feed["input_ids"].astype(np.float32)
+        out = np.stack([ids, np.ones_like(ids)], axis=-1)
+        out[feed["attention_mask"] == 0] = 100.0
+        return [out]
+
+@pytest.fixture
+def backend():
+    b = OnnxBackend.__new__(OnnxBackend)
+    b.tokenizer = FakeTokenizer()
+    b.session = FakeSession()
+    b.input_names = {"input_ids", "attention_mask"}
+    b.dimension = 2
+    return b
+
+def test_onnx_mean_pools_unpadded_tokens(backend):
+    vectors = backend.encode(["ab abcd", "abc"])
+    assert vectors.shape == (2, 2)
+    np.testing.assert_allclose(vectors[0], [3.0, 1.0])
+    np.testing.assert_allclose(vectors[1], [3.0, 1.0])
+
+def test_onnx_keeps_input_order_across_batches(backend):
+    texts = ["a b c d", "a", "abcdef", "a b"]
+    vectors = backend.encode(texts, batch_size=2, normalize_embeddings=True)
+    assert backend.session.batches == [2, 2]
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+    expected = backend.encode(["abcdef"], normalize_embeddings=True)[0]
+    np.testing.assert_allclose(vectors[2], expected)
+
+def test_onnx_single_string_gives_one_vector(backend):
+    assert backend.encode("abc").shape == (2,)
+
+def test_cache_key_depends_on_backend():
+    assert model_id("all-MiniLM-L6-v2", "torch") == "all-MiniLM-L6-v2"
+    assert model_id("all-MiniLM-L6-v2", "onnx") != "all-MiniLM-L6-v2"
+
+def test_backend_must_implement_encode():
+    class NoEncode(EmbeddingBackend):
+        pass
+    with pytest.raises(TypeError):
+        NoEncode()
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        load_backend("all-MiniLM-L6-v2", "tensorrt")
+
+def test_torch_backend_names_missing_extra(monkeypatch):
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+    with pytest.raises(ImportError, match=r"fremem\[torch\]"):
+        TorchBackend("all-MiniLM-L6-v2")
+
+def test_onnx_requires_model_dir(monkeypatch):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    monkeypatch.setattr(embeddings, "ONNX_MODEL_DIR", "")
+    with pytest.raises(ValueError):
+        OnnxBackend("all-MiniLM-L6-v2")
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import pytest
+from fremem.executor import StoreExecutor, StoreBusyError
+
+@pytest.mark.asyncio
+async def test_reads_run_while_write_is_blocked():
+    """A long write must not hold up reads."""
+    executor = StoreExecutor(max_reads=2, max_writes=1, max_queue=10)
+    release = threading.Event()
+    
+    write_task = asyncio.create_task(executor.run_write(release.wait, 5))
+    await asyncio.sleep(0.05)
+    
+    # Read completes even though the write is still running
+    result = await asyncio.wait_for(executor.run_read(lambda x: x * 2, 21), timeout=2)
+    assert result == 42
+    assert not write_task.done()
+    
+    release.set()
+    assert await write_task is True
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_queue_depth_limit(caplog):
+    """Calls beyond the queue depth are rejected and logged."""
+    executor = StoreExecutor(max_reads=1, max_writes=1, max_queue=1)
+    release = threading.Event()
+    
+    blocked = asyncio.create_task(executor.run_write(release.wait, 5))
+    await asyncio.sleep(0.05)
+    
+    with pytest.raises(StoreBusyError):
+        await executor.run_read(lambda: None)
+    assert "store operations queued" in caplog.text
+    
+    release.set()
+    await blocked
+    assert executor.pending == 0
+    executor.shutdown()
@@ -101,3 +101,84 @@ def test_ingest_replace_logic(test_project):
     finally:
         if os.path.exists(dummy_file):
             os.remove(dummy_file)
+
+def test_stats_payload(test_project):
+    store.add_many(test_project, [
+        {"id": f"doc{i}", "text": f"content {i}", "meta": {"source": f"file_{i % 3}.txt"}} for i in range(12)
+    ])
+    store.add("other-project", "x", "elsewhere", {"source": "other.txt"})
+    
+    stats = store.get_stats(test_project)
+    assert stats["chunk_count"] == 12
+    assert stats["source_count"] == 3
+    table = stats["table"]
+    assert table["version"] == store.tbl.version
+    assert table["num_fragments"] >= 1
+    assert table["bytes_on_disk"] > 0
+    assert table["indexed_rows"] + table["unindexed_rows"] == table["num_rows"]
+    
+    assert store.get_stats("empty-project")["chunk_count"] == 0
+
+def test_stats_table_figures_cached_per_version(test_project):
+    from fremem import optimize
+    store.add(test_project, "a", "first", {"source": "a.txt"})
+    
+    with patch("fremem.optimize.disk_usage", side_effect=optimize.disk_usage) as spy:
+        first = store.get_stats(test_project)["table"]
+        second = store.get_stats(test_project)["table"]
+        if first["version"] == second["version"]:
+            assert spy.call_count == 1
+            assert second == first
+        
+        store.add(test_project, "b", "second", {"source": "b.txt"})
+        calls = spy.call_count
+        third = store.get_stats(test_project)["table"]
+    assert third["version"] > first["version"]
+    assert spy.call_count == calls + 1
+    assert third["num_rows"] == 2
+
+def test_source_catalog(test_project):
+    store.add_many(test_project, [
+        {"id": "a1", "text": "alpha one", "meta": {"source": "docs/a.md"}},
+        {"id": "a2", "text": "alpha two", "meta": {"source": "docs/a.md"}},
+        {"id": "b1", "text": "beta", "meta": {"source": "docs/b.md"}},
+        {"id": "c1", "text": "gamma", "meta": {"source": "src/c.py"}},
+    ])
+    
+    entries = {e["source"]: e for e in store.source_catalog(test_project)}
+    assert entries["docs/a.md"]["chunk_count"] == 2
+    assert entries["docs/a.md"]["bytes"] == len("alpha one") + len("alpha two")
+    assert entries["docs/a.md"]["last_ingested_at"]
+    
+    assert store.list_sources(test_project, prefix="docs/") == ["docs/a.md", "docs/b.md"]
+    assert store.list_sources(test_project, offset=1, limit=2) == ["docs/b.md", "src/c.py"]
+    # Wildcards in the prefix match literally
+    assert store.list_sources(test_project, prefix="docs_") == []
+    assert store.list_sources(test_project, prefix="%") == []
+    
+    # Moving a chunk to another source updates both entries
+    store.add(test_project, "b1", "beta moved", {"source": "docs/a.md"})
+    assert store.list_sources(test_project) == ["docs/a.md", "src/c.py"]
+    assert store.source_catalog(test_project, prefix="docs/a")[0]["chunk_count"] == 3
+    assert store.source_catalog(test_project, prefix="docs/a")[0]["bytes"] == len("alpha onealpha twobeta moved")
+    
+    store.delete_ids(test_project, ["c1"])
+    assert store.list_sources(test_project) == ["docs/a.md"]
+    assert store.get_stats(test_project)["source_count"] == 1
+    
+    assert store.delete_source(test_project, "missing.md") is False
+    assert store.delete_source(test_project, "docs/a.md") is True
+    assert store.list_sources(test_project) == []
+    
+    # The catalog can be rebuilt from the memories themselves
+    store.add(test_project, "d1", "delta", {"source": "d.md"})
+    store.rebuild_catalog()
+    assert store.list_sources(test_project) == ["d.md"]
+
+def test_delete_source_without_catalog_entry(test_project):
+    store.add(test_project, "x1", "orphan chunk", {"source": "orphan.md"})
+    # Simulate a catalog update that failed after the data commit
+    store.catalog.remove(test_project, "orphan.md")
+    
+    assert store.delete_source(test_project, "orphan.md") is True
+    assert store.get_stats(test_project)["chunk_count"] == 0
@@ -55,3 +55,15 @@ def test_messages_endpoint():
             response = client.post("/messages", json={"jsonrpc": "2.0", "method": "ping", "id": 1})
             assert response.status_code == 200
             assert mock_handle.called
+
+def test_metrics_endpoint(mock_server_run):
+    from fremem.server_http import app
+
+    with patch("fremem.server_http.start_warm_up"), TestClient(app) as client:
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        body = response.json()
+        assert "store_pending" in body
+        assert body["query_batching"]["requests"] == 0
+        assert "hit_rate" in body["rerank_cache"]
+        assert "query_cache" in body
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from fremem.ingest import ingest_file
+from fremem.ingest import ingest_file, main
+import fremem.ingest
 
 @pytest.fixture
 def mock_ingest_store(mock_store):
@@ -29,3 +30,106 @@ def test_ingest_file(mock_ingest_store, tmp_path):
     assert len(results) >= 1
     assert "test file" in results[0]["text"]
     assert results[0]["metadata"]["source"] == str(p)
+
+def test_ingest_file_single_bulk_write(mock_ingest_store, tmp_path):
+    """All chunks of a file are written with one add_many call."""
+    p = tmp_path / "long.md"
+    p.write_text("\n\n".join(f"Paragraph {i} " + "word " * 150 for i in range(10)))
+
+    original_add_many = mock_ingest_store.add_many
+    with patch.object(mock_ingest_store, "add_many", side_effect=original_add_many) as spy, \
+         patch.object(mock_ingest_store, "add") as single_add:
+        ingest_file("bulk-ingest", str(p))
+
+    assert spy.call_count == 1
+    assert not single_add.called
+    records = spy.call_args[0][1]
+    assert len(records) > 1
+    assert [r["meta"]["chunk_index"] for r in records] == list(range(len(records)))
+
+def _run_main(argv):
+    with patch("sys.argv", ["fremem-ingest"] + argv):
+        main()
+
+def test_incremental_ingest_skips_unchanged(mock_ingest_store, tmp_path):
+    """Re-running ingest only re-processes added, modified or deleted files."""
+    a = tmp_path / "a.md"
+    b = tmp_path / "b.md"
+    a.write_text("Alpha document about rivers.")
+    b.write_text("Beta document about mountains.")
+    project_id = "incremental"
+    
+    _run_main(["--project", project_id, str(a), str(b)])
+    assert mock_ingest_store.get_stats(project_id)["chunk_count"] == 2
+    
+    original_build = fremem.ingest.build_records
+    with patch("fremem.ingest.build_records", side_effect=original_build) as spy:
+        # Nothing changed
+        _run_main(["--project", project_id, str(a), str(b)])
+        assert spy.call_count == 0
+        
+        # One file modified, one deleted
+        a.write_text("Alpha document about lakes.")
+        b.unlink()
+        _run_main(["--project", project_id, str(a)])
+        assert [c[0][0] for c in spy.call_args_list] == [str(a)]
+    
+    assert mock_ingest_store.list_sources(project_id) == [str(a)]
+    results = mock_ingest_store.search(project_id, "lakes", k=5)
+    assert "lakes" in results[0]["text"]
+
+def test_full_flag_forces_reingest(mock_ingest_store, tmp_path):
+    a = tmp_path / "a.md"
+    a.write_text("Alpha document.")
+    _run_main(["--project", "full-proj", str(a)])
+    
+    original_build = fremem.ingest.build_records
+    with patch("fremem.ingest.build_records", side_effect=original_build) as spy:
+        _run_main(["--project", "full-proj", "--full", str(a)])
+        assert spy.call_count == 1
+
+def test_reingest_only_embeds_changed_chunks(mock_ingest_store, tmp_path):
+    """A small edit re-embeds only the affected chunk and keeps the rest untouched."""
+    p = tmp_path / "doc.md"
+    paragraphs = [f"Paragraph {i} " + "lorem " * 150 for i in range(5)]
+    p.write_text("\n\n".join(paragraphs))
+    project_id = "diff-ingest"
+    
+    ingest_file(project_id, str(p))
+    count = mock_ingest_store.get_stats(project_id)["chunk_count"]
+    
+    paragraphs[2] = "Paragraph 2 was rewritten " + "ipsum " * 150
+    p.write_text("\n\n".join(paragraphs))
+    
+    original_add_many = mock_ingest_store.add_many
+    with patch.object(mock_ingest_store, "add_many", side_effect=original_add_many) as spy:
+        ingest_file(project_id, str(p))
+    
+    written = spy.call_args[0][1]
+    assert 0 < len(written) < count
+    assert any("rewritten" in r["text"] for r in written)
+    assert mock_ingest_store.get_stats(project_id)["chunk_count"] == count
+    
+    # Re-ingesting the identical file writes nothing
+    with patch.object(mock_ingest_store, "add_many", side_effect=original_add_many) as spy:
+        ingest_file(project_id, str(p))
+    assert spy.call_args[0][1] == []
+
+def test_relative_sources_survive_other_working_directory(mock_ingest_store, tmp_path, monkeypatch):
+    """A relative path is checked where it was ingested, not against the current directory."""
+    docs = tmp_path / "docs"
+    other = tmp_path / "other"
+    docs.mkdir()
+    other.mkdir()
+    (docs / "a.md").write_text("Alpha document about rivers.")
+    (other / "b.md").write_text("Beta document about mountains.")
+    
+    monkeypatch.chdir(docs)
+    _run_main(["--project", "relative", "a.md"])
+    monkeypatch.chdir(other)
+    _run_main(["--project", "relative", "b.md"])
+    assert sorted(mock_ingest_store.list_sources("relative")) == ["a.md", "b.md"]
+    
+    (docs / "a.md").unlink()
+    _run_main(["--project", "relative", "b.md"])
+    assert mock_ingest_store.list_sources("relative") == ["b.md"]
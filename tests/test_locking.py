@@ -0,0 +1,138 @@
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from unittest.mock import patch
+from fremem.db import VectorStore
+from fremem.locking import FileLock, store_lock
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+
+def try_lock_in_other_process(path):
+    code = (
+        "import sys; from fremem.locking import FileLock; "
+        f"sys.exit(0 if FileLock({path!r}).acquire(blocking=False) else 1)"
+    )
+    env = dict(os.environ, PYTHONPATH=SRC)
+    return subprocess.run([sys.executable, "-c", code], env=env).returncode == 0
+
+def test_lock_excludes_other_processes(temp_db_path):
+    lock = store_lock(temp_db_path, "write")
+    with lock:
+        assert not try_lock_in_other_process(lock.path)
+    assert try_lock_in_other_process(lock.path)
+
+def test_lock_is_reentrant_but_excludes_other_threads(temp_db_path):
+    lock = FileLock(os.path.join(temp_db_path, "locks", "test.lock"))
+    acquired = []
+    with lock:
+        with lock:
+            t = threading.Thread(target=lambda: acquired.append(lock.acquire(blocking=False)))
+            t.start()
+            t.join()
+        assert acquired == [False]
+        # Still held after the inner release
+        assert not try_lock_in_other_process(lock.path)
+    assert lock.acquire(blocking=False)
+    lock.release()
+
+def test_store_writes_take_the_write_lock(mock_store):
+    assert mock_store.router.write_lock is mock_store.write_lock
+    with mock_store.router.lock("p1"):
+        assert not try_lock_in_other_process(mock_store.write_lock.path)
+
+def open_store(path, mode="shared"):
+    """
+    A separate VectorStore on `path`, as another worker process would have.
+    The launcher migrates before starting workers, so they never do it in the background.
+    """
+    with patch("fremem.db.DB_PATH", path), patch("fremem.db.STORAGE_MODE", mode), \
+            patch("fremem.db.READ_CONSISTENCY_SECONDS", 0), patch.object(VectorStore, "_migrate_projects"):
+        VectorStore._instance = None
+        store = VectorStore()
+        store.initialize()
+    VectorStore._instance = None
+    return store
+
+def test_other_store_sees_dropped_and_recreated_project_table(temp_db_path):
+    a = open_store(temp_db_path, "per_project")
+    b = open_store(temp_db_path, "per_project")
+    a.add("p1", "d1", "alpha content", {"source": "a.md"})
+    assert [r["id"] for r in b.search("p1", "content", k=5)] == ["d1"]
+    
+    a.delete_project("p1")
+    assert b.router.resolve("p1") == (None, False)
+    assert b.search("p1", "content", k=5) == []
+    
+    # Writes through the other store land in the recreated table
+    a.add("p1", "d2", "beta content", {"source": "b.md"})
+    b.add("p1", "d3", "gamma content", {"source": "c.md"})
+    assert sorted(r["id"] for r in a.search("p1", "content", k=5)) == ["d2", "d3"]
+
+def test_other_store_notices_project_migrated_elsewhere(temp_db_path):
+    shared = open_store(temp_db_path)
+    shared.add("p1", "d1", "alpha content", {"source": "a.md"})
+    a = open_store(temp_db_path, "per_project")
+    b = open_store(temp_db_path, "per_project")
+    
+    a.router.migrate()
+    tbl, is_shared = b.router.resolve("p1")
+    assert not is_shared and tbl.name != b.tbl.name
+    assert [r["id"] for r in b.search("p1", "content", k=5)] == ["d1"]
+
+def test_embedding_cache_shared_between_stores(temp_db_path):
+    a = open_store(temp_db_path)
+    b = open_store(temp_db_path)
+    if a.embedding_cache is None:
+        pytest.skip("embedding cache disabled")
+    # Both opened before the cache table existed
+    assert a.embedding_cache.tbl is None and b.embedding_cache.tbl is None
+    
+    a.add("p1", "d1", "first text")
+    b.add("p1", "d2", "second text")
+    
+    assert b.embedding_cache.tbl is not None
+    keys = [b.embedding_cache.key(t) for t in ("first text", "second text")]
+    assert set(a.embedding_cache.get_many(keys)) == set(keys)
+
+def test_writes_do_not_wait_for_index_builds(mock_store):
+    mock_store.add("p1", "d0", "first memory")
+    building = threading.Event()
+    release = threading.Event()
+    def slow_build(*args, **kwargs):
+        building.set()
+        release.wait(10)
+        return "skipped"
+    
+    with patch("fremem.indexing.ensure_vector_index", side_effect=slow_build):
+        builder = threading.Thread(target=mock_store.ensure_indexes)
+        builder.start()
+        try:
+            assert building.wait(10)
+            writer = threading.Thread(target=mock_store.add, args=("p1", "d1", "second memory"))
+            writer.start()
+            writer.join(5)
+            assert not writer.is_alive()
+        finally:
+            release.set()
+            builder.join()
+    assert mock_store.get_stats("p1")["chunk_count"] == 2
+
+def test_compaction_commit_retried_under_write_lock(mock_store):
+    from lance.optimize import Compaction
+    for i in range(5):
+        mock_store.add("p1", f"d{i}", f"memory {i}")
+    commit = Compaction.commit
+    held = []
+    def conflicting_commit(ds, rewrites, *args, **kwargs):
+        held.append(mock_store.write_lock.held())
+        if len(held) == 1:
+            raise OSError("Retryable commit conflict for version 7: preempted by concurrent transaction Update")
+        return commit(ds, rewrites, *args, **kwargs)
+    
+    with patch("lance.optimize.Compaction.commit", side_effect=conflicting_commit):
+        results = mock_store.optimize(force=True, project_id="p1")
+    assert "fragments" in results["memory_store/compact"]
+    assert held == [True, True]
+    assert mock_store.get_stats("p1")["chunk_count"] == 5
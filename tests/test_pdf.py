@@ -1,7 +1,8 @@
 import pytest
 import os
 from unittest.mock import patch, MagicMock
-from fremem.ingest import ingest_file
+from concurrent.futures import ThreadPoolExecutor
+from fremem.ingest import ingest_file, iter_pdf_pages, PDF_PAGES_PER_TASK
 
 # Path to real PDF (relative to this test file)
 # ../../TestData/AI in HR Automation.pdf
@@ -28,15 +29,46 @@ def test_pdf_ingestion_mocked(mock_store):
         project_id = "pdf-test-mock"
         file_path = "dummy.pdf"
         
-        # Mock add to verify call
-        mock_store.add = MagicMock()
+        # Mock add_many to verify call
+        mock_store.add_many = MagicMock(return_value=1)
         
         with patch("os.path.exists", return_value=True):
             ingest_file(project_id, file_path)
         
-        assert mock_store.add.called
-        args = mock_store.add.call_args[0]
-        assert "Page 1 content." in args[2]
+        assert mock_store.add_many.called
+        records = mock_store.add_many.call_args[0][1]
+        assert "Page 1 content." in records[0]["text"]
+
+def _mock_pdf(num_pages):
+    mock_pdf_instance = MagicMock()
+    pages = []
+    for i in range(num_pages):
+        page = MagicMock()
+        page.extract_text.return_value = f"Content of page {i + 1}."
+        pages.append(page)
+    mock_pdf_instance.pages = pages
+    return mock_pdf_instance
+
+def test_pdf_chunks_carry_page_numbers(mock_store):
+    with patch("fremem.ingest.store", mock_store), \
+         patch("fremem.ingest.PdfReader", return_value=_mock_pdf(3)):
+        mock_store.add_many = MagicMock(return_value=3)
+        with patch("os.path.exists", return_value=True):
+            ingest_file("pdf-pages", "manual.pdf")
+    
+    records = mock_store.add_many.call_args[0][1]
+    assert [r["meta"]["page"] for r in records] == [1, 2, 3]
+    assert "page 2" in records[1]["text"]
+
+def test_parallel_page_extraction_keeps_order():
+    num_pages = PDF_PAGES_PER_TASK * 3 + 5
+    # Threads stand in for processes so the mocked reader is shared
+    with patch("fremem.ingest.PdfReader", return_value=_mock_pdf(num_pages)), \
+         patch("fremem.ingest.ProcessPoolExecutor", ThreadPoolExecutor):
+        pages = list(iter_pdf_pages("big.pdf", workers=2))
+    
+    assert [n for n, _ in pages] == list(range(1, num_pages + 1))
+    assert pages[-1][1] == f"Content of page {num_pages}."
 
 @pytest.mark.skipif(not os.path.exists(REAL_PDF_PATH), reason="Real PDF file not found")
 def test_pdf_ingestion_real_file(mock_store):
@@ -53,21 +85,21 @@ def test_pdf_ingestion_real_file(mock_store):
         
         # Inspection via search is better for integration test.
         # But for direct verification, let's spy.
-        original_add = mock_store.add
-        mock_store.add = MagicMock(side_effect=original_add)
+        original_add_many = mock_store.add_many
+        mock_store.add_many = MagicMock(side_effect=original_add_many)
         
         ingest_file(project_id, REAL_PDF_PATH)
         
-        assert mock_store.add.called
+        assert mock_store.add_many.called
         
         # Check that we got some text
         # We don't know exact content, but we expect non-empty text
-        call_args = mock_store.add.call_args_list
+        call_args = mock_store.add_many.call_args_list
         full_text = ""
         for call in call_args:
-            args = call[0] # (project_id, doc_id, text, metadata)
-            text = args[2]
-            full_text += text
+            records = call[0][1] # (project_id, records)
+            for record in records:
+                full_text += record["text"]
             
         assert len(full_text) > 100
         print(f"DEBUG: Extracted {len(full_text)} chars from PDF")
@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from fremem.pipeline import IngestPipeline
+from fremem.ingest import build_records
+
+@pytest.fixture
+def mock_pipeline_store(mock_store):
+    with patch("fremem.ingest.store", mock_store):
+        yield mock_store
+
+def _write_docs(tmp_path, n):
+    paths = []
+    for i in range(n):
+        p = tmp_path / f"doc{i}.md"
+        p.write_text(f"Document {i} talks about topic number {i}.")
+        paths.append(str(p))
+    return paths
+
+def test_pipeline_batches_files_into_few_writes(mock_pipeline_store, tmp_path):
+    paths = _write_docs(tmp_path, 6)
+    done = []
+    
+    original_add_many = mock_pipeline_store.add_many
+    with patch.object(mock_pipeline_store, "add_many", side_effect=original_add_many) as spy:
+        pipeline = IngestPipeline(mock_pipeline_store, "pipe-proj", build_records,
+                                  flush_size=4, on_file_done=lambda path, ids: done.append(path))
+        written = pipeline.run(paths)
+    
+    assert written == 6
+    assert not pipeline.errors
+    assert sorted(done) == sorted(paths)
+    # Files are grouped into batches of at least flush_size chunks
+    assert spy.call_count == 2
+    assert mock_pipeline_store.get_stats("pipe-proj")["chunk_count"] == 6
+
+def test_pipeline_process_pool(mock_pipeline_store, tmp_path):
+    paths = _write_docs(tmp_path, 4)
+    pipeline = IngestPipeline(mock_pipeline_store, "pool-proj", build_records, workers=2)
+    assert pipeline.run(paths) == 4
+    assert sorted(mock_pipeline_store.list_sources("pool-proj")) == sorted(paths)
+
+def test_pipeline_reports_bad_file(mock_pipeline_store, tmp_path):
+    paths = _write_docs(tmp_path, 2)
+    missing = str(tmp_path / "missing.md")
+    pipeline = IngestPipeline(mock_pipeline_store, "err-proj", build_records)
+    assert pipeline.run(paths + [missing]) == 2
+    assert list(pipeline.errors) == [missing]
+
+def test_pipeline_streams_large_file_in_windows(mock_pipeline_store, tmp_path):
+    paths = _write_docs(tmp_path, 1)
+    records = [
+        {"id": f"big#{i}", "text": f"Section {i} of a long document.", "meta": {"source": paths[0], "chunk_index": i}}
+        for i in range(5)
+    ]
+    consumed = []
+    def prepare(path):
+        for rec in records:
+            consumed.append(rec["id"])
+            yield rec
+    done = []
+    
+    original_add_many = mock_pipeline_store.add_many
+    with patch.object(mock_pipeline_store, "add_many", side_effect=original_add_many) as spy:
+        pipeline = IngestPipeline(mock_pipeline_store, "stream-proj", prepare, flush_size=2,
+                                  on_file_done=lambda path, ids: done.append((path, ids)))
+        assert pipeline.run(paths) == 5
+    
+    # The generator was consumed window by window and the file finished once
+    assert spy.call_count == 3
+    assert done == [(paths[0], [r["id"] for r in records])]
+    assert mock_pipeline_store.get_stats("stream-proj")["chunk_count"] == 5
@@ -0,0 +1,83 @@
+import time
+import pytest
+from fremem.rerank import Reranker
+
+class KeywordModel:
+    """Scores a pair by how many query words appear in the text."""
+    def __init__(self):
+        self.calls = 0
+    
+    def predict(self, pairs):
+        self.calls += 1
+        return [sum(w in text for w in query.split()) for query, text in pairs]
+
+@pytest.fixture
+def reranker():
+    r = Reranker()
+    r.model = KeywordModel()
+    # As measured by warm_up()
+    r.pair_seconds = 0.0
+    return r
+
+CANDIDATES = [
+    {"id": "a", "text": "unrelated text"},
+    {"id": "b", "text": "cache invalidation"},
+    {"id": "c", "text": "cache"},
+]
+
+def test_reorders_by_cross_encoder_score(reranker):
+    results = reranker.rerank("cache invalidation", CANDIDATES, k=2, version=1)
+    assert [r["id"] for r in results] == ["b", "c"]
+    assert results[0]["rerank_score"] == 2
+
+def test_scores_cached_per_table_version(reranker):
+    reranker.rerank("cache", CANDIDATES, k=3, version=1)
+    reranker.rerank("cache", CANDIDATES, k=3, version=1)
+    assert reranker.model.calls == 1
+    
+    # A write bumps the version and invalidates cached scores
+    reranker.rerank("cache", CANDIDATES, k=3, version=2)
+    assert reranker.model.calls == 2
+
+def test_scores_cached_per_project(reranker):
+    # Projects sharing a table see the same version and may reuse chunk ids
+    notes = [{"id": "a", "project_id": "p1", "text": "cache invalidation"},
+             {"id": "b", "project_id": "p1", "text": "unrelated text"}]
+    other = [{"id": "a", "project_id": "p2", "text": "unrelated text"},
+             {"id": "b", "project_id": "p2", "text": "cache invalidation"}]
+    version = ("memory_store", 7)
+    
+    assert [r["id"] for r in reranker.rerank("cache", notes, k=1, version=version)] == ["a"]
+    results = reranker.rerank("cache", other, k=1, version=version)
+    assert [r["id"] for r in results] == ["b"]
+    assert results[0]["rerank_score"] == 1
+    assert reranker.model.calls == 2
+
+def test_falls_back_when_over_budget(reranker):
+    reranker.pair_seconds = 1.0
+    results = reranker.rerank("cache invalidation", CANDIDATES, k=2, version=1,
+                              deadline=time.monotonic() + 0.5)
+    assert [r["id"] for r in results] == ["a", "b"]
+    assert "rerank_score" not in results[0]
+    assert reranker.model.calls == 0
+    assert reranker.fallbacks == 1
+
+def test_loads_in_background_and_keeps_order_meanwhile(monkeypatch):
+    import sys
+    import types
+    fake = types.ModuleType("sentence_transformers")
+    fake.CrossEncoder = lambda name: KeywordModel()
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake)
+    
+    r = Reranker()
+    results = r.rerank("cache invalidation", CANDIDATES, k=2, version=1)
+    # No stall on the first query: first-stage order while the model loads
+    assert [row["id"] for row in results] == ["a", "b"]
+    assert r.fallbacks == 1
+    
+    deadline = time.monotonic() + 5
+    while not r.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert r.ready and r.pair_seconds is not None
+    results = r.rerank("cache invalidation", CANDIDATES, k=2, version=1)
+    assert [row["id"] for row in results] == ["b", "c"]
@@ -1,3 +1,4 @@
+import threading
 import pytest
 from fremem.db import store
 import os
@@ -27,6 +28,10 @@ def cleanup(test_project):
     db.DB_PATH = original_path
     store.initialized = False
 
+def build_fts(project_id):
+    """Wait for the full-text index that writes start building in the background."""
+    store._build_fts(store._scope(project_id)[0], blocking=True)
+
 def test_metadata_filtering(test_project):
     # Add docs with different metadata
     store.add(test_project, "doc1", "python code function", {"type": "code", "lang": "py"})
@@ -64,3 +69,143 @@ def test_score_returned(test_project):
     results_exact = store.search(test_project, "apple", k=1)
     # Should be very close to 0
     assert results_exact[0]["_distance"] < 0.1
+
+def test_sparse_filter_still_returns_k(test_project):
+    # Many non-matching rows that are closer to the query than the matching ones
+    store.add_many(test_project, [
+        {"id": f"noise{i}", "text": f"function definition number {i}", "meta": {"type": "code"}}
+        for i in range(30)
+    ])
+    store.add_many(test_project, [
+        {"id": f"decision{i}", "text": f"we decided to use tool {i}", "meta": {"type": "decision", "owner": "ops"}}
+        for i in range(4)
+    ])
+    
+    # Pushed-down key
+    results = store.search(test_project, "function definition", k=4, filter_meta={"type": "decision"})
+    assert sorted(r["id"] for r in results) == [f"decision{i}" for i in range(4)]
+    
+    # Key without a typed column still finds every match
+    results = store.search(test_project, "function definition", k=4, filter_meta={"owner": "ops"})
+    assert len(results) == 4
+
+def test_tags_and_int_filters(test_project):
+    store.add(test_project, "a", "alpha notes", {"tags": ["infra", "db"], "chunk_index": 0})
+    store.add(test_project, "b", "beta notes", {"tags": ["infra"], "chunk_index": 1})
+    
+    results = store.search(test_project, "notes", k=5, filter_meta={"tags": ["infra", "db"]})
+    assert [r["id"] for r in results] == ["a"]
+    
+    results = store.search(test_project, "notes", k=5, filter_meta={"chunk_index": 1})
+    assert [r["id"] for r in results] == ["b"]
+
+def test_compile_filter():
+    from fremem.schema import compile_filter
+    
+    clauses, exact = compile_filter({"type": "code", "chunk_index": 3})
+    assert clauses == ["doc_type = 'code'", "chunk_index = 3"]
+    assert exact
+    
+    clauses, exact = compile_filter({"lang": "it's"})
+    assert clauses == ["metadata_json LIKE '%\"lang\": \"it''s\"%' ESCAPE '\\'"]
+    assert not exact
+    
+    clauses, _ = compile_filter({"note": "50%_off"})
+    assert clauses == ["metadata_json LIKE '%\"note\": \"50\\%\\_off\"%' ESCAPE '\\'"]
+
+def test_filter_on_escaped_json_values(test_project):
+    # json.dumps stores these as "Jos\u00e9" and "say \"hi\"": backslashes in the LIKE pattern
+    store.add(test_project, "jose", "notes from the meeting", {"author": "José"})
+    store.add(test_project, "quote", "notes from the meeting", {"author": 'say "hi"'})
+    store.add(test_project, "other", "notes from the meeting", {"author": "Jose"})
+    
+    results = store.search(test_project, "meeting notes", k=5, filter_meta={"author": "José"})
+    assert [r["id"] for r in results] == ["jose"]
+    
+    results = store.search(test_project, "meeting notes", k=5, filter_meta={"author": 'say "hi"'})
+    assert [r["id"] for r in results] == ["quote"]
+    
+    # The delete_source fallback relies on the same LIKE clause alone
+    from fremem.schema import metadata_like
+    tbl = store._scope(test_project)[0]
+    for value, doc_id in (("José", "jose"), ('say "hi"', "quote")):
+        assert [r["id"] for r in tbl.search(None).where(metadata_like("author", value)).to_list()] == [doc_id]
+
+def test_similarity_score_and_min_score(test_project):
+    store.add(test_project, "close", "the cat sat on the mat")
+    store.add(test_project, "far", "quarterly revenue projections for the finance team")
+    
+    results = store.search(test_project, "the cat sat on the mat", k=5)
+    assert results[0]["id"] == "close"
+    assert results[0]["score"] > 0.99
+    assert all(0.0 <= r["score"] <= 1.0 for r in results)
+    assert results[0]["score"] == pytest.approx(1.0 - results[0]["_distance"], abs=1e-6)
+    
+    # Thresholds drop the unrelated tail
+    results = store.search(test_project, "the cat sat on the mat", k=5, min_score=0.8)
+    assert [r["id"] for r in results] == ["close"]
+    results = store.search(test_project, "the cat sat on the mat", k=5, max_distance=0.2)
+    assert [r["id"] for r in results] == ["close"]
+
+def test_keyword_and_hybrid_search(test_project):
+    store.add(test_project, "flag", "Set ENABLE_FAST_SYNC_V2 to true to turn on the new sync engine.")
+    store.add(test_project, "prose", "The synchronization engine keeps replicas up to date.")
+    store.add(test_project, "other", "Deployment checklist for the staging cluster.")
+    
+    build_fts(test_project)
+    results = store.search(test_project, "ENABLE_FAST_SYNC_V2", k=3, mode="keyword")
+    assert results[0]["id"] == "flag"
+    assert "_score" in results[0]
+    
+    results = store.search(test_project, "how does the sync engine work", k=3, mode="hybrid")
+    assert {r["id"] for r in results[:2]} == {"flag", "prose"}
+    assert all("_relevance_score" in r for r in results)
+    
+    # Keyword weight 0 makes hybrid ranking follow the vector leg
+    vector_ids = [r["id"] for r in store.search(test_project, "replicas", k=3)]
+    hybrid_ids = [r["id"] for r in store.search(test_project, "replicas", k=3, mode="hybrid", keyword_weight=0.0)]
+    assert hybrid_ids == vector_ids
+
+def test_identifier_query_skips_model(test_project):
+    store.add(test_project, "flag", "Set ENABLE_FAST_SYNC_V2 to true.")
+    build_fts(test_project)
+    store.query_cache.clear()
+    
+    with patch.object(store.model, "encode") as encode:
+        results = store.search(test_project, "ENABLE_FAST_SYNC_V2", k=1, mode="hybrid")
+    
+    assert results[0]["id"] == "flag"
+    assert not encode.called
+
+def test_looks_like_identifier():
+    from fremem.hybrid import looks_like_identifier
+    for q in ["get_user_id", "fooBar", "PROJ-123", "--dry-run", "config.yaml"]:
+        assert looks_like_identifier(q)
+    for q in ["architecture decisions", "duplicate", "how does sync work"]:
+        assert not looks_like_identifier(q)
+
+def test_keyword_search_without_index_falls_back_to_vector(test_project):
+    store.add(test_project, "flag", "Set ENABLE_FAST_SYNC_V2 to true.")
+    tbl = store._scope(test_project)[0]
+    build_fts(test_project)
+    store._fts_ready.discard(tbl.name)
+    
+    # Another reader or maintenance pass holds the index lock: the search must not wait for it
+    lock = store._index_lock(tbl.name)
+    held = threading.Event()
+    release = threading.Event()
+    def hold():
+        with lock:
+            held.set()
+            release.wait()
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+    try:
+        with patch("fremem.indexing.index_stats", return_value=None):
+            results = store.search(test_project, "sync flag", k=1, mode="keyword")
+        assert results[0]["id"] == "flag"
+        assert "_distance" in results[0]
+    finally:
+        release.set()
+        holder.join()
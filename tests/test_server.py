@@ -1,4 +1,5 @@
 import pytest
+import json
 from unittest.mock import patch, MagicMock
 from fremem.server import list_tools, call_tool, list_resources, read_resource
 
@@ -15,6 +16,7 @@ async def test_list_tools():
     tool_names = [t.name for t in tools]
     assert "memory_search" in tool_names
     assert "memory_add" in tool_names
+    assert "memory_add_batch" in tool_names
 
 @pytest.mark.asyncio
 async def test_memory_add_tool(mock_server_store):
@@ -37,6 +39,28 @@ async def test_memory_add_tool(mock_server_store):
     assert len(results) == 1
     assert results[0]["text"] == "verify me"
 
+@pytest.mark.asyncio
+async def test_memory_add_batch_tool(mock_server_store):
+    """Test the memory_add_batch tool with one invalid item."""
+    args = {
+        "project_id": "batch-proj",
+        "items": [
+            {"id": "d1", "text": "first decision", "meta": {"type": "decision"}},
+            {"id": "d2", "text": "second decision"},
+            {"text": "no id here"},
+        ]
+    }
+    
+    result = await call_tool("memory_add_batch", args)
+    
+    summary = json.loads(result[0].text)
+    assert summary["added"] == 2
+    assert summary["failed"] == 1
+    assert [r["status"] for r in summary["results"]] == ["added", "added", "error"]
+    
+    results = mock_server_store.search("batch-proj", "decision", k=5)
+    assert sorted(r["id"] for r in results) == ["d1", "d2"]
+
 @pytest.mark.asyncio
 async def test_memory_search_tool(mock_server_store):
     """Test the memory_search tool."""
@@ -54,6 +78,11 @@ async def test_memory_search_tool(mock_server_store):
     assert len(result) == 1
     assert result[0].type == "text"
     assert "found duplicate" in result[0].text
+    assert "Score:" in result[0].text
+    
+    # A threshold nothing can reach returns no results
+    result = await call_tool("memory_search", dict(args, min_score=1.01))
+    assert result[0].text == "No relevant memories found."
 
 @pytest.mark.asyncio
 async def test_resource_handlers():
@@ -65,3 +94,33 @@ async def test_resource_handlers():
     # Read resource (should fail)
     with pytest.raises(ValueError):
         await read_resource("some://uri")
+
+def test_server_import_is_light():
+    """Importing the server must not pull in torch; the model loads in the background."""
+    import subprocess
+    import sys
+    import os
+    code = "import sys, fremem.server; print('sentence_transformers' in sys.modules or 'torch' in sys.modules)"
+    src = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         env=dict(os.environ, PYTHONPATH=src))
+    assert out.stdout.strip() == "False", out.stderr
+
+def test_failed_model_load_is_retried(mock_server_store):
+    model = MagicMock()
+    with patch.object(mock_server_store, "_model_future", None), \
+            patch("fremem.embeddings.load_backend", side_effect=[OSError("download failed"), model]):
+        with pytest.raises(OSError):
+            mock_server_store.warm_up().result(timeout=5)
+        assert mock_server_store.warm_up().result(timeout=5) is model
+
+@pytest.mark.asyncio
+async def test_non_embedding_tools_do_not_wait_for_model(mock_server_store):
+    from concurrent.futures import Future
+    pending = Future()
+    # A model that never finishes loading
+    with patch.object(mock_server_store, "_model_future", pending):
+        result = await call_tool("memory_stats", {"project_id": "cold-proj"})
+        assert json.loads(result[0].text)["chunk_count"] == 0
+        result = await call_tool("memory_list_sources", {"project_id": "cold-proj"})
+        assert json.loads(result[0].text) == []